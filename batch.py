@@ -0,0 +1,152 @@
+# runs many headless simulations in parallel, one per combination of launcher parameters and seed.
+# every finished run is appended to a jsonl file straight away, so a crash loses nothing that already finished,
+# and running the same batch again skips the runs that are already in the file.
+# a run is known by a hash of all its parameters, so a batch that was changed or reordered still skips the right ones.
+import argparse
+import hashlib
+import importlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import settings as st
+import dataset
+import engine
+import kernels
+
+models = {'gravity': 'launcher_simulation', 'drag': 'launcher_with_drag'}
+# parameters that belong to the launcher. max_velocity is the speed limit of the targets instead.
+launcher_parameters = ('damping', 'mass', 'gravity', 'flight_time', 'xy_angular_nozzle_speed',
+                       'max_tomato_velocity_mag')
+
+
+def grid(seeds, **values):
+    """Every combination of the given parameter values, once per seed."""
+    names = list(values)
+    runs = [dict(zip(names, combination), seed=seed)
+            for combination in itertools.product(*values.values()) for seed in seeds]
+    for run_parameters in runs:
+        if 'flight_time' in run_parameters:
+            run_parameters['flight_time'] = int(round(run_parameters['flight_time']))  # flight time is in frames.
+    return runs
+
+
+def random_sample(number_of_runs, seed=None, **ranges):
+    """number_of_runs runs with every parameter drawn uniformly from its (low, high) range, and a seed each."""
+    rng = np.random.default_rng(seed)
+    runs = [{name: float(rng.uniform(low, high)) for name, (low, high) in ranges.items()}
+            for _ in range(number_of_runs)]
+    for run_parameters in runs:
+        run_parameters['seed'] = int(rng.integers(2 ** 31))
+        if 'flight_time' in run_parameters:
+            run_parameters['flight_time'] = int(round(run_parameters['flight_time']))  # flight time is in frames.
+    return runs
+
+
+def run(seed, model='drag', number_of_targets=st.number_of_targets, max_ticks=10000, **parameters):
+    """One headless simulation. Returns its metrics."""
+    rng = np.random.default_rng(seed)
+    targets = dataset.random_targets(rng, number_of_targets, parameters.get('max_velocity', st.max_velocity))
+    launcher = importlib.import_module(models[model]).TomatoLauncher(targets)
+    for name in launcher_parameters:
+        if name in parameters:
+            setattr(launcher, name, parameters[name])
+    simulation = engine.Engine(launcher).run(max_ticks)
+    return {'kills': launcher.kills,
+            'misses': launcher.misses,
+            'time_to_clear': None if simulation.running else simulation.ticks,
+            'mean_miss_distance': (launcher.miss_distance_total / launcher.landed_misses
+                                   if launcher.landed_misses else None),
+            'ticks': simulation.ticks}
+
+
+def run_key(run_parameters, model='drag', number_of_targets=st.number_of_targets, max_ticks=10000):
+    """Hash of everything that decides the outcome of a run, the same for the same run in any batch."""
+    parameters = dict(run_parameters, model=model, number_of_targets=number_of_targets, max_ticks=max_ticks)
+    return hashlib.sha1(json.dumps(parameters, sort_keys=True).encode()).hexdigest()
+
+
+def finished_runs(results_path):
+    """Keys of the runs that already have results in results_path."""
+    if not os.path.exists(results_path):
+        return set()
+    with open(results_path) as results:
+        records = [json.loads(line) for line in results if line.strip()]
+    return {record['key'] for record in records if 'key' in record and 'error' not in record}
+
+
+def run_batch(runs, results_path, workers=None, retries=1, backend='numpy', **common):
+    """Runs every parameter dict in runs across a process pool and appends one json line per run to results_path.
+
+    The workers use the kernels of backend, see kernels.py. Numba kernels run on one thread per worker,
+    the pool already keeps every core busy.
+
+    A run that raises is recorded with its error. If a worker process dies, the runs it took down with it
+    are retried in a fresh pool up to retries times.
+    """
+    done = finished_runs(results_path)
+    pending = []
+    for run_parameters in runs:
+        key = run_key(run_parameters, **common)
+        if key not in done:
+            done.add(key)  # the same run twice in runs is run once.
+            pending.append((key, run_parameters))
+    with open(results_path, 'a') as results:
+        for attempt in range(retries + 1):
+            broken = []
+            with ProcessPoolExecutor(workers, initializer=kernels.use, initargs=(backend, 1)) as pool:
+                futures = {pool.submit(run, **common, **run_parameters): (key, run_parameters)
+                           for key, run_parameters in pending}
+                for future in as_completed(futures):
+                    key, run_parameters = futures[future]
+                    record = {'key': key, **run_parameters}
+                    try:
+                        record.update(future.result())
+                    except BrokenProcessPool:
+                        if attempt < retries:
+                            broken.append((key, run_parameters))
+                            continue
+                        record['error'] = 'worker process died'
+                    except Exception as error:
+                        record['error'] = repr(error)
+                    results.write(json.dumps(record) + '\n')
+                    results.flush()
+            if not broken:
+                break
+            pending = broken
+
+
+def parse_parameters(arguments):
+    """name=1,2,3 lists values for a grid, name=low:high gives a range to sample from."""
+    values, ranges = {}, {}
+    for argument in arguments:
+        name, text = argument.split('=')
+        if ':' in text:
+            ranges[name] = tuple(float(v) for v in text.split(':'))
+        else:
+            values[name] = [float(v) for v in text.split(',')]
+    return values, ranges
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Monte-Carlo sweeps over launcher parameters.')
+    parser.add_argument('parameters', nargs='*', help='damping=0.1,0.5 for a grid or damping=0.1:1 for sampling')
+    parser.add_argument('--model', choices=list(models), default='drag')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--samples', type=int, help='sample this many runs from the ranges instead of a grid')
+    parser.add_argument('--targets', type=int, default=st.number_of_targets)
+    parser.add_argument('--max-ticks', type=int, default=10000)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--backend', choices=list(kernels.backends), default='numpy',
+                        help='kernels of the workers, numba only pays off for very many targets')
+    parser.add_argument('--out', default='results.jsonl')
+    args = parser.parse_args()
+    values, ranges = parse_parameters(args.parameters)
+    if args.samples:
+        batch = random_sample(args.samples, seed=args.seeds[0], **ranges)
+    else:
+        batch = grid(args.seeds, **values)
+    run_batch(batch, args.out, workers=args.workers, backend=args.backend, model=args.model,
+              number_of_targets=args.targets, max_ticks=args.max_ticks)
@@ -0,0 +1,107 @@
+# bearing index, so a sweep only looks at the targets near its sector instead of all of them.
+# targets are binned by their bearing around the launcher. a target that moves can only change its bearing
+# by so much per tick, so each one stays valid in its bin for a number of ticks we can work out up front.
+# it is only re-binned when that runs out, which keeps the per tick work incremental.
+# bins are lists of index arrays. moving a target only appends it to its new bin, the stale entry in the old bin
+# is dropped when that bin is next queried, so re-binning stays vectorized.
+import numpy as np
+import kernels
+from targets import sector_mask
+
+
+class BearingIndex:
+    """Bins the bearings of a TargetStore around origin and answers sweep sector queries."""
+    max_valid_ticks = 1 << 30  # stationary targets never need re-binning.
+
+    def __init__(self, targets, origin, bin_width=2.0, margin=4.0):
+        self.targets = targets
+        self.origin = np.asarray(origin, dtype=float)
+        self.bin_width = bin_width  # degrees.
+        self.margin = margin  # degrees a target may drift out of its bin before it has to be re-binned.
+        self.number_of_bins = int(np.ceil(360 / bin_width))
+        self.bins = [[] for _ in range(self.number_of_bins)]  # may hold stale entries, bin_of has the truth.
+        self.bin_of = np.full(len(targets.pos), -1, dtype=np.int64)
+        self.schedule = {}  # tick -> list of index arrays that are due for re-binning at that tick.
+        self.tick = 0
+        self.rebin(targets.alive_indices())
+
+    def advance(self):
+        """Call once per tick, after the targets moved."""
+        self.tick += 1
+        due = self.schedule.pop(self.tick, None)
+        if due is not None:
+            self.rebin(np.concatenate(due))
+
+    def add(self, indices):
+        """Indexes targets that were just added to the store."""
+        if len(self.bin_of) < len(self.targets.pos):
+            grown = np.full(len(self.targets.pos), -1, dtype=np.int64)
+            grown[:len(self.bin_of)] = self.bin_of
+            self.bin_of = grown
+        self.rebin(indices)
+
+    def rebin(self, indices):
+        """Puts targets into the bins of their current bearing and works out how long they stay there."""
+        alive = self.targets.alive[indices]
+        self.bin_of[indices[~alive]] = -1
+        indices = indices[alive]
+        if len(indices) == 0:
+            return
+        # how long a target stays valid in its bin is worked out in kernels.bin_bearings.
+        new_bins, valid = kernels.bin_bearings(self.targets.pos, self.targets.vel, indices, self.origin, self.bin_width,
+                                               self.number_of_bins, self.margin, self.max_valid_ticks)
+        old_bins = self.bin_of[indices]
+        moved = old_bins != new_bins
+        self.bin_of[indices] = new_bins
+        self.append(indices[moved], new_bins[moved])
+        due_ticks = self.tick + valid + 1
+        order = np.argsort(due_ticks, kind='stable')
+        due_ticks, indices = due_ticks[order], indices[order]
+        for tick, chunk in groups(due_ticks, indices):
+            self.schedule.setdefault(tick, []).append(chunk)
+
+    def append(self, indices, bins):
+        order = np.argsort(bins, kind='stable')
+        for b, chunk in groups(bins[order], indices[order]):
+            self.bins[b].append(chunk)
+
+    def members(self, b):
+        """Targets in bin b. Drops the stale entries of the bin while at it."""
+        if not self.bins[b]:
+            return np.empty(0, dtype=np.int64)
+        indices = np.concatenate(self.bins[b])
+        indices = np.unique(indices[self.bin_of[indices] == b])
+        self.bins[b] = [indices]
+        return indices
+
+    def candidates(self, min_angle, max_angle):
+        """Targets whose bin can hold a bearing between min_angle and max_angle."""
+        if np.abs(max_angle - min_angle) < 10:
+            arcs = [(min_angle, max_angle)]
+        else:
+            arcs = [(max_angle, 360), (0, min_angle)]
+        chosen = set()
+        for low, high in arcs:
+            first = int((low - self.margin) // self.bin_width)
+            last = int((high + self.margin) // self.bin_width)
+            chosen.update(b % self.number_of_bins for b in range(first, min(last, first + self.number_of_bins - 1) + 1))
+        if not chosen:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.members(b) for b in chosen])
+
+    def query(self, min_angle, max_angle):
+        """Same answer as sector_mask over every alive target, returned as sorted indices and their angles."""
+        indices = self.candidates(min_angle, max_angle)
+        indices = np.unique(indices[self.targets.alive[indices]])
+        angles = kernels.bearings(self.targets.pos, indices, self.origin)
+        inside = sector_mask(angles, min_angle, max_angle)
+        return indices[inside], angles[inside]
+
+
+def groups(keys, values):
+    """Splits values into (key, chunk) runs of equal sorted keys."""
+    if len(keys) == 0:
+        return []
+    starts = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    bounds = [0] + starts.tolist() + [len(keys)]
+    return [(keys[start], values[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
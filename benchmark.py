@@ -0,0 +1,202 @@
+# timings of the hot paths of the simulation, across target counts.
+# python benchmark.py --save before.json, change something, then python benchmark.py --compare before.json
+# lists everything that got slower than the tolerance allows.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+import numpy as np
+import dataset
+import engine
+import intercept
+import kernels
+import launcher_with_drag
+import spatial_grid
+from targets import TargetStore
+
+default_sizes = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+
+
+def best_of(function, repeat=3, setup=None):
+    """Fastest of repeat runs of function, in seconds. setup runs untimed before each of them."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def launcher(number_of_targets):
+    return launcher_with_drag.TomatoLauncher(dataset.random_targets(np.random.default_rng(0), number_of_targets))
+
+
+def load_and_touch(path):
+    """What a run needs before its first tick: the targets in a TargetStore with every value read once."""
+    targets = TargetStore(*dataset.read_dataset(path))
+    return targets.pos.sum() + targets.vel.sum()
+
+
+def bench_load(number_of_targets):
+    """Time to get the same targets from targets.csv and from a binary scenario into a TargetStore and read them.
+
+    A scenario is mapped, not read, so opening it costs next to nothing and the reading happens on first touch.
+    load_npy_open is just the mapping. The file is in the page cache after the first repeat, these are warm loads.
+    """
+    import pandas as pd
+    target_pos, target_vel = dataset.random_targets(np.random.default_rng(0), number_of_targets)
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'targets.csv')
+        scenario_path = os.path.join(directory, 'targets.npy')
+        pd.DataFrame(np.hstack([target_pos, target_vel]), columns=dataset.columns).to_csv(csv_path, index=False)
+        dataset.csv_to_scenario(csv_path, scenario_path)
+        return {'load_csv': best_of(lambda: load_and_touch(csv_path)),
+                'load_npy': best_of(lambda: load_and_touch(scenario_path)),
+                'load_npy_open': best_of(lambda: dataset.read_dataset(scenario_path))}
+
+
+def bench_tick(number_of_targets):
+    """One engine tick: target motion, sweep, aiming and flights."""
+    simulation = engine.Engine(launcher(number_of_targets))
+    simulation.step()
+    return {'tick': best_of(simulation.step, repeat=5)}
+
+
+def bench_kinematics(number_of_targets):
+    """Intercepts for every target at once, and the trajectories to them."""
+    shooter = launcher(number_of_targets)
+    velocity, impact, _ = intercept.solve(shooter, shooter.targets.pos, shooter.targets.vel)
+    return {'intercept': best_of(lambda: intercept.solve(shooter, shooter.targets.pos, shooter.targets.vel)),
+            'trajectory': best_of(lambda: shooter.trajectory(velocity, impact))}
+
+
+def bench_flights(number_of_tomatoes):
+    """One step of the flight scheduler with number_of_tomatoes tomatoes in the air."""
+    shooter = launcher(number_of_tomatoes)
+    velocity, impact, _ = intercept.solve(shooter, shooter.targets.pos, shooter.targets.vel)
+    flights = shooter.flights
+
+    def fill():
+        flights.velocity = velocity
+        flights.target = np.arange(number_of_tomatoes)
+        flights.age = np.zeros(number_of_tomatoes, dtype=np.int64)
+        flights.impact = impact
+    return {'flights': best_of(flights.step, setup=fill)}
+
+
+def bench_collateral(number_of_targets, number_of_tomatoes=100):
+    """Building the spatial grid over the targets, and one step of 100 tomatoes that can hit any of them."""
+    shooter = launcher(number_of_targets)
+    aimed_at = np.arange(number_of_tomatoes)
+    velocity, impact, _ = intercept.solve(shooter, shooter.targets.pos[aimed_at], shooter.targets.vel[aimed_at])
+    flights = shooter.flights
+    grid = spatial_grid.SpatialGrid()
+
+    def fill():
+        flights.velocity = velocity
+        flights.target = aimed_at
+        flights.age = np.zeros(number_of_tomatoes, dtype=np.int64)
+        flights.impact = impact
+    return {'grid_build': best_of(lambda: grid.build(shooter.targets)),
+            'collateral': best_of(lambda: flights.step(grid), setup=fill)}
+
+
+def bench_draw(number_of_targets):
+    """One frame of the pygame renderer, under the dummy video driver."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    try:
+        import renderer
+    except ImportError:
+        return {}
+    view = renderer.Simulation(engine.Engine(launcher(number_of_targets)), tick_delay=0)
+    view.draw()
+    return {'draw': best_of(view.draw)}
+
+
+# the simulation must not pull these in just by being imported, see startup().
+optional_modules = ('pandas', 'pygame', 'colorama', 'numba')
+startup_budget = 0.5  # seconds importing engine may take, numpy included.
+
+
+def startup(module='engine'):
+    """Seconds it takes a fresh interpreter to import module, and the optional modules that came with it."""
+    imports = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__))).stderr
+    seconds, loaded = 0.0, set()
+    for line in imports.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue  # the header.
+        if name.strip() == module and not name[1:].startswith(' '):
+            seconds = int(cumulative) / 10 ** 6
+        if name.strip().split('.')[0] in optional_modules:
+            loaded.add(name.strip().split('.')[0])
+    return seconds, sorted(loaded)
+
+
+benchmarks = {'load': bench_load, 'tick': bench_tick, 'kinematics': bench_kinematics,
+              'flights': bench_flights, 'collateral': bench_collateral, 'draw': bench_draw}
+
+
+def run(sizes=default_sizes, only=None):
+    """{benchmark: {size: seconds}} for every benchmark at every size."""
+    results = {}
+    for name, bench in benchmarks.items():
+        if only and name not in only:
+            continue
+        for size in sizes:
+            for result, seconds in bench(size).items():
+                results.setdefault(result, {})[str(size)] = seconds
+                print(f'{result:>13} N={size:<8} {seconds * 1000:10.3f} ms', flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Every (benchmark, size, ratio) that is more than tolerance slower than in baseline."""
+    regressions = []
+    for result, times in results.items():
+        for size, seconds in times.items():
+            before = baseline.get(result, {}).get(size)
+            if before and seconds > before * (1 + tolerance):
+                regressions.append((result, size, seconds / before))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks of the simulation hot paths.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=default_sizes)
+    parser.add_argument('--only', nargs='+', choices=list(benchmarks))
+    parser.add_argument('--save', help='write the results to this json file')
+    parser.add_argument('--compare', help='baseline json file to check the results against')
+    parser.add_argument('--backend', choices=list(kernels.backends), default=kernels.current,
+                        help='kernels to time, see kernels.py')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slow down, 0.2 is 20%%')
+    parser.add_argument('--startup-budget', type=float, default=startup_budget,
+                        help='seconds importing engine may take, numpy included')
+    args = parser.parse_args()
+    seconds, loaded = startup()
+    print(f'{"startup":>13} {seconds * 1000:21.3f} ms' + (f', also imports {", ".join(loaded)}' if loaded else ''))
+    failed = seconds > args.startup_budget or bool(loaded)
+    if failed:
+        print(f'startup is over the budget of {args.startup_budget * 1000:.0f} ms or imports optional modules')
+    kernels.parity()  # timings of a backend that gets it wrong are worthless.
+    kernels.use(args.backend)
+    results = run(args.sizes, args.only)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for result, size, ratio in regressions:
+            print(f'regression: {result} N={size} is {ratio:.2f}x the baseline')
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
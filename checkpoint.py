@@ -0,0 +1,86 @@
+# snapshots of a running engine, taken between two ticks. a snapshot is one .npz file holding the target arrays,
+# the state of every launcher and its tomatoes in the air, the clock and the state of the spawner's rng,
+# so restoring it and stepping on gives exactly the same run as never having stopped.
+# the bearing indices are not saved, they only depend on the targets and are rebuilt on restore.
+import json
+import numpy as np
+from bearing_index import BearingIndex
+
+# launcher attributes that change while running, or that batch.py may have changed before the run.
+launcher_state = ('tick', 'nozzle_dir', 'old_dir', 'reload_timer', 'kills', 'misses', 'miss_distance_total',
+                  'landed_misses', 'xy_angular_nozzle_speed', 'max_tomato_velocity_mag', 'gravity', 'flight_time',
+                  'reload_time', 'damping', 'mass')
+flight_state = ('velocity', 'target', 'age', 'impact')
+
+
+def save(engine, path):
+    """Writes the state of engine to path. Call it between ticks."""
+    targets = engine.targets
+    size = targets.size
+    arrays = {'pos': targets.pos[:size], 'vel': targets.vel[:size],
+              'alive': targets.alive[:size], 'engaged': targets.engaged[:size]}
+    meta = {'tick': engine.clock.tick, 'dt': engine.clock.dt, 'launchers': []}
+    for number, launcher in enumerate(engine.launchers):
+        scalars = {}
+        for name in launcher_state:
+            if not hasattr(launcher, name):
+                continue
+            value = getattr(launcher, name)
+            if isinstance(value, (np.ndarray, np.generic)):
+                arrays[f'launcher{number}.{name}'] = value  # keeps float16 as float16.
+            else:
+                scalars[name] = value
+        meta['launchers'].append(scalars)
+        flights = launcher.flights
+        for name in flight_state:
+            arrays[f'launcher{number}.flights.{name}'] = getattr(flights, name)
+        velocity, target, impact = zip(*flights.pending) if flights.pending else ((), (), ())
+        arrays[f'launcher{number}.pending.velocity'] = np.array(velocity, dtype=float).reshape(-1, 3)
+        arrays[f'launcher{number}.pending.target'] = np.array(target, dtype=np.int64)
+        arrays[f'launcher{number}.pending.impact'] = np.array(impact, dtype=np.int64)
+    spawner = engine.spawner
+    if spawner is not None:
+        meta['spawner'] = {'spawned': spawner.spawned, 'rate': spawner.rate, 'total': spawner.total,
+                           'rng': spawner.rng.bit_generator.state}
+    with open(path, 'wb') as file:
+        np.savez_compressed(file, meta=np.array(json.dumps(meta)), **arrays)
+
+
+def load(engine, path):
+    """Restores the state saved in path into engine, which has to be set up like the one that was saved:
+    the same launcher models at the same positions, and a spawner if it had one."""
+    with np.load(path) as snapshot:
+        meta = json.loads(snapshot['meta'][()])
+        if len(meta['launchers']) != len(engine.launchers):
+            raise ValueError(f'{path} holds {len(meta["launchers"])} launchers, '
+                             f'the engine has {len(engine.launchers)}')
+        targets = engine.targets
+        pos, alive = snapshot['pos'], snapshot['alive']
+        targets.pos, targets.vel = np.ascontiguousarray(pos), np.ascontiguousarray(snapshot['vel'])
+        targets.alive, targets.engaged = alive.copy(), snapshot['engaged'].copy()
+        targets.size = len(pos)
+        targets.count = int(np.count_nonzero(alive))
+        engine.clock.tick = meta['tick']
+        engine.clock.dt = meta['dt']
+        for number, (launcher, scalars) in enumerate(zip(engine.launchers, meta['launchers'])):
+            for name in launcher_state:
+                key = f'launcher{number}.{name}'
+                if key in snapshot:
+                    value = snapshot[key]
+                    setattr(launcher, name, value[()] if value.ndim == 0 else value)
+                elif name in scalars:
+                    setattr(launcher, name, scalars[name])
+            flights = launcher.flights
+            for name in flight_state:
+                setattr(flights, name, snapshot[f'launcher{number}.flights.{name}'])
+            flights.pending = list(zip(snapshot[f'launcher{number}.pending.velocity'],
+                                       snapshot[f'launcher{number}.pending.target'].tolist(),
+                                       snapshot[f'launcher{number}.pending.impact'].tolist()))
+            launcher.bearing_index = BearingIndex(targets, launcher.position)
+    if 'spawner' in meta:
+        if engine.spawner is None:
+            raise ValueError(f'{path} was saved with a spawner, the engine has none')
+        spawner, state = engine.spawner, meta['spawner']
+        spawner.spawned, spawner.rate, spawner.total = state['spawned'], state['rate'], state['total']
+        spawner.rng.bit_generator.state = state['rng']
+    return engine
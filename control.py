@@ -0,0 +1,273 @@
+# asyncio interface to a running engine. producers put target spawns and velocity changes on the command queue,
+# subscribers get state snapshots together with the hits and misses since their last one.
+# the tick loop never waits for a subscriber. a snapshot that was not picked up yet is replaced by the newer one
+# and the events it carried are kept for the next, so a slow subscriber skips snapshots but never misses a hit.
+# a command that cannot be applied is skipped and reported to the subscribers, it never stops the ticks.
+# serve() offers the same over a local socket, one json object per line each way.
+# python control.py runs a simulation fed by the stand in producer, add --serve to also listen on a socket.
+import argparse
+import asyncio
+import importlib
+import json
+import numpy as np
+import settings as st
+import batch
+import dataset
+import engine
+import events
+
+
+class Subscription:
+    """Where the controller leaves snapshots for one subscriber."""
+    def __init__(self):
+        self.snapshot = None  # latest snapshot that was not picked up yet.
+        self.events = []  # event record arrays that were not picked up yet.
+        self.errors = []  # commands that could not be applied, not picked up yet.
+        self.dropped = 0  # snapshots replaced by a newer one before they were picked up.
+        self.closed = False
+        self.ready = asyncio.Event()
+
+    def put(self, snapshot, records, errors=()):
+        if self.snapshot is not None:
+            self.dropped += 1
+        self.snapshot = snapshot
+        if len(records):
+            self.events.append(records)
+        self.errors += errors
+        self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+    async def get(self):
+        """Waits for the next snapshot and returns it, with the event records since the last one under 'events'
+        and the commands that failed since then under 'errors'.
+        Returns None once the controller stopped and everything was picked up."""
+        while self.snapshot is None:
+            if self.closed:
+                return None
+            self.ready.clear()
+            await self.ready.wait()
+        records = np.concatenate(self.events) if self.events else np.empty(0, dtype=events.record)
+        snapshot = dict(self.snapshot, events=records, errors=self.errors)
+        self.snapshot = None
+        self.events = []
+        self.errors = []
+        return snapshot
+
+
+class Controller:
+    """Runs an engine on the asyncio loop, applying commands between ticks and publishing snapshots.
+
+    Commands are dicts: {'type': 'spawn', 'pos': N x 3, 'vel': N x 3} adds targets and
+    {'type': 'velocity', 'targets': N, 'vel': N x 3} changes the velocities of targets.
+    With snapshot_every, a snapshot is published every that many ticks.
+    """
+    def __init__(self, simulation, snapshot_every=1):
+        self.engine = simulation
+        self.snapshot_every = snapshot_every
+        self.commands = asyncio.Queue()
+        self.subscriptions = []
+        self.records = []  # event records of the ticks since the last snapshot.
+        self.errors = []  # {'tick', 'type', 'error'} of the commands that failed since the last snapshot.
+        self.stopped = False
+        # the controller is a sink of the event logs of the launchers, to hear about hits and misses.
+        shared = None
+        for launcher in self.engine.launchers:
+            if launcher.events is None:
+                if shared is None:
+                    shared = events.EventLog([], verbosity=events.HITS)
+                launcher.events = shared
+            if self not in launcher.events.sinks:
+                launcher.events.sinks.append(self)
+            launcher.events.verbosity = max(launcher.events.verbosity, events.HITS)
+
+    def write(self, records):
+        self.records.append(records.copy())  # the log reuses its buffer.
+
+    def close(self):
+        pass
+
+    def subscribe(self):
+        subscription = Subscription()
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.remove(subscription)
+
+    def check(self, command):
+        """The command with its values as arrays. Raises ValueError if it is not one that can be applied."""
+        if not isinstance(command, dict):
+            raise ValueError('a command is an object with a type')
+        kind = command.get('type')
+        if kind not in ('spawn', 'velocity'):
+            raise ValueError(f'unknown command type {kind!r}')
+        try:
+            vel = np.asarray(command['vel'], dtype=float).reshape(-1, 3)
+            if kind == 'spawn':
+                values = {'pos': np.asarray(command['pos'], dtype=float).reshape(-1, 3), 'vel': vel}
+                count = len(values['pos'])
+            else:
+                targets = np.asarray(command['targets'])
+                if targets.size and targets.dtype.kind not in 'iu':
+                    raise ValueError('targets have to be integer indices')
+                values = {'targets': targets.astype(np.int64).reshape(-1), 'vel': vel}
+                count = len(values['targets'])
+        except KeyError as missing:
+            raise ValueError(f'{kind} command needs {missing}') from None
+        except TypeError as error:
+            raise ValueError(str(error)) from None
+        if len(vel) != count:
+            raise ValueError(f'{kind} command has {count} targets but {len(vel)} velocities')
+        if not all(np.all(np.isfinite(value)) for name, value in values.items() if name != 'targets'):
+            raise ValueError(f'{kind} command has values that are not finite')
+        if kind == 'velocity' and count and (values['targets'].min() < 0
+                                             or values['targets'].max() >= self.engine.targets.size):
+            raise ValueError(f'target indices have to be in [0, {self.engine.targets.size})')
+        return dict(values, type=kind)
+
+    def apply(self, command):
+        command = self.check(command)
+        if command['type'] == 'spawn':
+            self.engine.add_targets(command['pos'], command['vel'])
+        else:
+            self.engine.set_velocities(command['targets'], command['vel'])
+
+    def snapshot(self):
+        simulation = self.engine
+        targets = simulation.targets
+        alive = targets.alive_indices()
+        return {'tick': simulation.ticks,
+                'time': simulation.clock.time,
+                'kills': simulation.kills,
+                'misses': simulation.misses,
+                'targets': alive,
+                'pos': targets.pos[alive],
+                'vel': targets.vel[alive],
+                'tomatoes': [launcher.flights.positions for launcher in simulation.launchers]}
+
+    def publish(self):
+        records = np.concatenate(self.records) if self.records else np.empty(0, dtype=events.record)
+        errors, self.records, self.errors = self.errors, [], []
+        if self.subscriptions:
+            snapshot = self.snapshot()
+            for subscription in self.subscriptions:
+                subscription.put(snapshot, records, errors)
+
+    def stop(self):
+        self.stopped = True
+
+    async def run(self, max_ticks=None, tick_delay=0.0):
+        """Ticks until stop() is called or max_ticks is reached. Every tick first applies the queued commands,
+        the ones that fail are left out and reported with the next snapshot.
+        tick_delay is the seconds to sleep between ticks, zero still lets the producers and subscribers run."""
+        try:
+            while not self.stopped and (max_ticks is None or self.engine.ticks < max_ticks):
+                while not self.commands.empty():
+                    command = self.commands.get_nowait()
+                    try:
+                        self.apply(command)
+                    except ValueError as error:
+                        kind = command.get('type') if isinstance(command, dict) else None
+                        self.errors.append({'tick': self.engine.ticks, 'type': kind, 'error': str(error)})
+                self.engine.step()
+                self.engine.flush_events()
+                if self.engine.ticks % self.snapshot_every == 0:
+                    self.publish()
+                await asyncio.sleep(tick_delay)
+        finally:
+            self.stopped = True
+            for subscription in self.subscriptions:
+                subscription.close()
+
+
+async def stand_in_producer(controller, rate=5, changes=5, seed=None, interval=0.0):
+    """Feeds the controller like the real feed would, until it stops: about rate new targets and changes changes
+    of velocity of random alive targets every interval seconds."""
+    rng = np.random.default_rng(seed)
+    spawner = dataset.TargetSpawner(rate, seed=rng.integers(2 ** 31))
+    while not controller.stopped:
+        pos, vel = spawner.spawn()
+        await controller.commands.put({'type': 'spawn', 'pos': pos, 'vel': vel})
+        alive = controller.engine.targets.alive_indices()
+        if len(alive):
+            chosen = rng.choice(alive, min(changes, len(alive)), replace=False)
+            vel = rng.uniform(-st.max_velocity, st.max_velocity, (len(chosen), 3))
+            await controller.commands.put({'type': 'velocity', 'targets': chosen, 'vel': vel})
+        await asyncio.sleep(interval)
+
+
+def to_json(snapshot):
+    """A snapshot as one line of json."""
+    message = {name: value.tolist() if isinstance(value, (np.ndarray, np.generic)) else value
+               for name, value in snapshot.items() if name not in ('events', 'tomatoes')}
+    message['tomatoes'] = [tomatoes.tolist() for tomatoes in snapshot['tomatoes']]
+    message['events'] = []
+    for tick, kind, target, *values in snapshot['events'].tolist():
+        message['events'].append({'tick': tick, 'event': events.names[kind], 'target': target,
+                                  **dict(zip(events.fields[kind], values))})
+    return json.dumps(message) + '\n'
+
+
+async def serve(controller, host='127.0.0.1', port=8765):
+    """Serves the controller on a local socket. Each client sends commands and receives snapshots,
+    one json object per line. A line that is not a valid command is answered with {"error": ...} on that
+    client's socket and never reaches the controller. Returns the asyncio server."""
+    async def client(reader, writer):
+        subscription = controller.subscribe()
+
+        async def send():
+            while (snapshot := await subscription.get()) is not None:
+                writer.write(to_json(snapshot).encode())
+                await writer.drain()  # only this client waits for its socket, the tick loop does not.
+            writer.close()  # the controller stopped.
+        sending = asyncio.create_task(send())
+        try:
+            while line := await reader.readline():
+                try:
+                    command = controller.check(json.loads(line))
+                except ValueError as error:  # bad json is a ValueError too.
+                    writer.write((json.dumps({'error': str(error)}) + '\n').encode())
+                    continue
+                await controller.commands.put(command)
+        finally:
+            sending.cancel()
+            controller.unsubscribe(subscription)
+            writer.close()
+    return await asyncio.start_server(client, host, port)
+
+
+async def main(args):
+    no_targets = (np.empty((0, 3)), np.empty((0, 3)))
+    launcher = importlib.import_module(batch.models[args.model]).TomatoLauncher(no_targets)
+    controller = Controller(engine.Engine(launcher), snapshot_every=args.snapshot_every)
+    server = await serve(controller, port=args.port) if args.serve else None
+    producer = asyncio.create_task(stand_in_producer(controller, args.rate, args.changes, seed=args.seed))
+    subscription = controller.subscribe()
+    running = asyncio.create_task(controller.run(args.ticks, args.tick_delay))
+    hits = 0
+    while (snapshot := await subscription.get()) is not None:
+        hits += np.count_nonzero(snapshot['events']['kind'] == events.HIT)
+        if snapshot['tick'] % 100 == 0:
+            print(f'tick {snapshot["tick"]}: {len(snapshot["targets"])} targets, {hits} hits, '
+                  f'{subscription.dropped} snapshots dropped')
+    await running
+    await producer
+    if server is not None:
+        server.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs a simulation fed by the stand in producer.')
+    parser.add_argument('--model', choices=list(batch.models), default='drag')
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--tick-delay', type=float, default=0.0)
+    parser.add_argument('--snapshot-every', type=int, default=1)
+    parser.add_argument('--rate', type=float, default=1, help='mean targets spawned per tick')
+    parser.add_argument('--changes', type=int, default=5, help='velocity changes per tick')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--serve', action='store_true', help='also listen for clients on a local socket')
+    parser.add_argument('--port', type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
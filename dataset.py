@@ -1,42 +1,118 @@
 
 import numpy as np
-import pandas as pd
 import settings as st
+import sys
 
+block_size = 1 << 16  # targets drawn from one random stream by generate_scenario.
+columns = ['x_Position', 'y_Position', 'z_Position', 'x_Velocity', 'y_Velocity', 'z_Velocity']
 
-def generate_targets_dataset():
-    columns = ['x_Position', 'y_Position', 'z_Position', 'x_Velocity', 'y_Velocity', 'z_Velocity']
-    targets = {
-        'x_Position': np.random.uniform(200, 760, st.number_of_targets),
-        'y_Position': np.random.uniform(200, 440, st.number_of_targets),
-        'z_Position': np.random.uniform(-100, 100, st.number_of_targets),
-        'x_Velocity': np.random.uniform(-st.max_velocity, st.max_velocity, st.number_of_targets),
-        'y_Velocity': np.random.uniform(-st.max_velocity, st.max_velocity, st.number_of_targets),
-        'z_Velocity': np.random.uniform(-st.max_velocity, st.max_velocity, st.number_of_targets),
-    }
-    targets = pd.DataFrame(targets)
-    targets.to_csv('targets.csv', index=False)
 
+def random_targets(rng, number_of_targets, max_velocity=st.max_velocity):
+    """positions and velocities of new targets, drawn from rng."""
+    target_pos = np.column_stack([rng.uniform(200, 760, number_of_targets),
+                                  rng.uniform(200, 440, number_of_targets),
+                                  rng.uniform(-100, 100, number_of_targets)])
+    target_vel = rng.uniform(-max_velocity, max_velocity, (number_of_targets, 3))
+    return target_pos, target_vel
 
-def read_dataset(dataset):
-    targets = pd.read_csv(dataset)
-    targets_pos_x = targets['x_Position'].values
-    targets_pos_y = targets['y_Position'].values
-    targets_pos_z = targets['z_Position'].values
 
-    targets_vel_x = targets['x_Velocity'].values
-    targets_vel_y = targets['y_Velocity'].values
-    targets_vel_z = targets['z_Velocity'].values
+def generate_scenario(path, number_of_targets=st.number_of_targets, seed=None, chunk_size=10 ** 6):
+    """Streams random targets to a csv or .npy file chunk by chunk, so memory use is bounded by chunk_size
+    (or block_size, if that is larger).
 
-    target_vel = np.zeros([st.number_of_targets, 3])
-    target_pos = np.zeros([st.number_of_targets, 3])
-    for target in range(st.number_of_targets):
-        target_pos[target] = np.array([targets_pos_x[target], targets_pos_y[target], targets_pos_z[target]])
-        target_vel[target] = np.array([targets_vel_x[target], targets_vel_y[target], targets_vel_z[target]])
+    The same seed always gives the same targets, whatever the chunk size.
+    """
+    rng = np.random.default_rng(seed)
+    # each block of block_size targets gets its own stream spawned from the seed, and chunks are written from
+    # whole blocks, so the chunk size does not change what is drawn.
+    number_of_blocks = max(-(-number_of_targets // block_size), 1)
+    streams = rng.spawn(number_of_blocks)
+    blocks_per_chunk = max(chunk_size // block_size, 1)
+    if str(path).endswith('.npy'):
+        scenario = np.lib.format.open_memmap(path, mode='w+', dtype='float32', shape=(2, number_of_targets, 3))
+    else:
+        import pandas as pd  # only csv needs pandas.
+        pd.DataFrame(columns=columns).to_csv(path, index=False)
+    for first_block in range(0, number_of_blocks, blocks_per_chunk):
+        start = first_block * block_size
+        blocks = [random_targets(stream, min(block_size, number_of_targets - (first_block + i) * block_size))
+                  for i, stream in enumerate(streams[first_block:first_block + blocks_per_chunk])]
+        target_pos = np.concatenate([target_pos for target_pos, _ in blocks])
+        target_vel = np.concatenate([target_vel for _, target_vel in blocks])
+        if str(path).endswith('.npy'):
+            scenario[0, start:start + len(target_pos)] = target_pos
+            scenario[1, start:start + len(target_vel)] = target_vel
+        else:
+            pd.DataFrame(np.hstack([target_pos, target_vel]), columns=columns).to_csv(path, mode='a',
+                                                                                     header=False, index=False)
+    if str(path).endswith('.npy'):
+        scenario.flush()
 
-    return target_pos, target_vel
 
+def generate_targets_dataset(seed=None):
+    generate_scenario('targets.csv', st.number_of_targets, seed=seed)
+
+
+class TargetSpawner:
+    """Spawns targets during a run instead of having the whole population up front.
+
+    Every tick a Poisson distributed number of targets with mean rate appears, until total targets were spawned.
+    """
+    def __init__(self, rate, total=None, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.rate = rate
+        self.total = total  # None spawns forever.
+        self.spawned = 0
+
+    @property
+    def exhausted(self):
+        return self.total is not None and self.spawned >= self.total
+
+    def spawn(self):
+        """positions and velocities of the targets that appear this tick."""
+        number_of_targets = self.rng.poisson(self.rate)
+        if self.total is not None:
+            number_of_targets = min(number_of_targets, self.total - self.spawned)
+        self.spawned += number_of_targets
+        return random_targets(self.rng, number_of_targets)
+
+
+def read_csv(dataset):
+    import pandas as pd  # only csv needs pandas.
+    targets = pd.read_csv(dataset, usecols=columns)[columns].to_numpy(dtype=float)
+    return targets[:, 0:3], targets[:, 3:6]
 
-if __name__ == '__main__':
-    generate_targets_dataset()
 
+# binary scenarios are plain .npy files holding one float32 array of shape 2 x N x 3,
+# positions first and velocities second. np.load can memory map them, so nothing is parsed or copied on load.
+def write_scenario(path, target_pos, target_vel):
+    scenario = np.stack([np.asarray(target_pos, dtype='float32'), np.asarray(target_vel, dtype='float32')])
+    np.save(path, scenario)
+
+
+def read_scenario(path):
+    # copy on write mapping. targets can be moved in place without touching the file,
+    # and only the pages that are written to get copied.
+    scenario = np.load(path, mmap_mode='c')
+    return scenario[0], scenario[1]
+
+
+def csv_to_scenario(csv_path, scenario_path):
+    write_scenario(scenario_path, *read_csv(csv_path))
+
+
+def read_dataset(dataset):
+    """reads targets from a csv or a binary scenario, returns positions and velocities."""
+    if str(dataset).endswith('.npy'):
+        return read_scenario(dataset)
+    return read_csv(dataset)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        csv_to_scenario(sys.argv[1], sys.argv[2])  # python dataset.py targets.csv targets.npy
+    elif len(sys.argv) > 3:
+        # python dataset.py scenario.npy number_of_targets seed
+        generate_scenario(sys.argv[1], int(sys.argv[2]), seed=int(sys.argv[3]))
+    else:
+        generate_targets_dataset()
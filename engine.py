@@ -0,0 +1,298 @@
+# headless core of the simulation. no pygame, no sleeps and no console output in here,
+# so it runs as fast as the CPU allows and also works on a box without a display.
+import numpy as np
+from time import perf_counter
+import settings as st
+import dataset
+from targets import TargetStore
+from bearing_index import BearingIndex
+from flights import FlightScheduler
+from spatial_grid import SpatialGrid
+import intercept
+import kinematics
+import events
+
+
+# initialize TomatoLauncher class.
+# it takes targets as input. several launchers can share the same targets, see Engine.
+# assumption: It can only see a set area in front of its nozzle at a given time in radians.
+# assumption: It is fast enough to change directions instantaneously when it sees a target.
+# assumption: Its calculations are instant.
+class TomatoLauncher:
+    """Sweeps, shoots and checks hits. Subclasses supply the physics through acceleration and coefficients()."""
+    hit_distance = 2  # if tomato is closer than this to its target, assume that target was hit.
+
+    def __init__(self, targets=None, position=None):
+        self.events = None  # optional events.EventLog.
+        self.tick = 0
+        self.xy_angular_nozzle_speed = np.float16(-0.05)
+        self.max_tomato_velocity_mag = None  # fastest launch speed, None for no limit.
+        self.gravity = st.gravity
+        if position is None:
+            position = [st.screen_size[0] / 2, st.screen_size[1] / 2, 0]
+        self.position = np.array(position, dtype=float)  # where launcher is located.
+        self.nozzle_dir = np.array([1, 0])  # Where launcher is looking on xy plane.
+        self.old_dir = self.nozzle_dir  # where it was looking before the last sweep.
+        self.flight_time = 10  # Tomatoes can fly for this many frames.
+        self.reload_time = 1  # ticks between two shots.
+        self.reload_timer = 0
+        self.kills = 0
+        self.misses = 0
+        self.miss_distance_total = 0.0  # summed over the misses whose tomato actually landed.
+        self.landed_misses = 0
+        self.flights = FlightScheduler(self)
+        self.targets = None
+        self.bearing_index = None
+        if targets is None:
+            self.read_dataset()
+        elif isinstance(targets, TargetStore):
+            self.share_targets(targets)
+        else:
+            self.set_targets(*targets)
+
+    def read_dataset(self, path='targets.csv'):
+        """reads the dataset created by dataset.py."""
+        self.set_targets(*dataset.read_dataset(path))
+
+    def set_targets(self, pos, vel):
+        self.share_targets(TargetStore(pos, vel))
+
+    def share_targets(self, targets):
+        """Uses a target store that other launchers may be shooting at as well."""
+        self.targets = targets
+        self.bearing_index = BearingIndex(self.targets, self.position)
+
+    @staticmethod
+    def rotate_vector(vector, angle):
+        """Rotates XY plane by an angle."""
+        rotation_matrix = np.array([[np.cos(angle), np.sin(angle)], [-np.sin(angle), np.cos(angle)]])
+        rotated_vector = np.dot(rotation_matrix, vector)
+        return rotated_vector
+
+    @staticmethod
+    def get_direction(vector):
+        vector = vector[0:2]
+        vector_abs = np.abs(vector)
+        vector_mag = np.sum(vector_abs)
+        return vector / vector_mag
+
+    def sweep(self):
+        """Turns the nozzle a bit and returns the free targets it passed over, with their bearings."""
+        self.tick += 1
+        self.old_dir = self.nozzle_dir.copy()
+        old_angle = np.degrees(np.arctan2(self.old_dir[1], self.old_dir[0])) + 180
+        self.nozzle_dir = self.rotate_vector(self.nozzle_dir, self.xy_angular_nozzle_speed)
+        new_angle = np.degrees(np.arctan2(self.nozzle_dir[1], self.nozzle_dir[0])) + 180
+        max_angle = np.max([old_angle, new_angle])
+        min_angle = np.min([old_angle, new_angle])
+        if self.events is not None:
+            self.events.emit(events.SWEEP, self.tick, a=old_angle, b=new_angle)
+        self.reload_timer = max(self.reload_timer - 1, 0)
+        if self.reload_timer > 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # check if there are any targets between old and new angles.
+        found, target_angles = self.bearing_index.query(min_angle, max_angle)
+        free = ~self.targets.engaged[found]
+        return found[free], target_angles[free]
+
+    def reachable(self, found, target_angles):
+        """The targets of found that a tomato can actually hit, with their bearings, launch velocities and frames
+        of impact. The intercepts of all of them are solved at once, a target that needs a launch faster than
+        max_tomato_velocity_mag falls short of it and is left out."""
+        if len(found) == 0:
+            return found, target_angles, np.empty((0, 3)), np.empty(0, dtype=np.int64)
+        velocity, impact, miss = intercept.solve(self, self.targets.pos[found], self.targets.vel[found],
+                                                 max_speed=self.max_tomato_velocity_mag)
+        hits = miss < self.hit_distance
+        return found[hits], target_angles[hits], velocity[hits], impact[hits]
+
+    def fire(self, hit, target_angle, velocity, impact):
+        """Shoots at the target with the launch velocity and frame of impact that reachable() solved for it."""
+        if self.events is not None:
+            self.events.emit(events.TARGET, self.tick, hit, a=target_angle)
+        self.destroy(hit, velocity, impact)
+
+    @property
+    def acceleration(self):
+        """Acceleration vector acting on a tomato in flight."""
+        raise NotImplementedError
+
+    def coefficients(self, frames):
+        """c1 and c2 of kinematics.position() after frames frames of flight."""
+        raise NotImplementedError
+
+    def aim(self, desired_target_pos, frames=None):
+        """Initial velocities (N x 3) of tomatoes that reach desired_target_pos (N x 3) after frames frames,
+        flight_time by default."""
+        c1, c2 = self.coefficients(self.flight_time if frames is None else frames)
+        return kinematics.initial_velocity(self.position, desired_target_pos, self.acceleration, c1, c2)
+
+    def trajectory(self, velocity, frames):
+        """Positions of tomatoes launched with velocity (K x 3) after frames (K) frames of flight."""
+        c1, c2 = self.coefficients(frames)
+        return kinematics.position(self.position, velocity, self.acceleration, c1[..., None], c2[..., None])
+
+    def destroy(self, hit, tomato_velocity, impact):
+        """Shoots at the target. The tomato is stepped by the flight scheduler, the sweep does not stop for it."""
+        if self.events is not None:
+            self.events.emit(events.SHOT, self.tick, hit, *tomato_velocity)
+        self.flights.launch(tomato_velocity, hit, impact)
+        self.targets.engaged[hit] = True
+        self.reload_timer = self.reload_time
+        desired_target_pos = self.targets.pos[hit] + self.targets.vel[hit] * impact
+        self.nozzle_dir = self.get_direction(desired_target_pos - self.position)
+
+    def resolve_flights(self, grid=None):
+        hits, distances, lost, miss_distances, released = self.flights.step(grid)
+        if self.events is not None:
+            self.events.emit_many(events.HIT, self.tick, hits, distances)
+            self.events.emit_many(events.MISS, self.tick, lost, miss_distances)
+        for hit in hits:
+            if self.targets.alive[hit]:
+                self.kills += 1
+            self.targets.kill(hit)
+        self.misses += len(lost)
+        landed = ~np.isnan(miss_distances)
+        self.landed_misses += np.count_nonzero(landed)
+        self.miss_distance_total += float(np.sum(miss_distances[landed]))
+        self.targets.engaged[hits] = False
+        self.targets.engaged[lost] = False
+        self.targets.engaged[released] = False
+
+
+class Clock:
+    """Simulation time. It only moves when the engine steps, by dt seconds per tick, whatever the wall clock does."""
+    def __init__(self, dt=0.05):
+        self.dt = dt
+        self.tick = 0
+
+    @property
+    def time(self):
+        return self.tick * self.dt
+
+    def advance(self):
+        self.tick += 1
+
+
+class Engine:
+    """Steps launchers with no display and no sleeps, as fast as the CPU allows.
+
+    Launchers share the targets of the first one. Every tick each launcher that is loaded may take one of the
+    targets its sweep passed over, and no two launchers take the same target.
+    With collateral, tomatoes also hit any other target they pass close to, found through a spatial grid.
+    """
+    def __init__(self, launchers, spawner=None, dt=0.05, collateral=False):
+        self.launchers = list(launchers) if isinstance(launchers, (list, tuple)) else [launchers]
+        self.launcher = self.launchers[0]
+        self.targets = self.launcher.targets
+        for launcher in self.launchers[1:]:
+            if launcher.targets is not self.targets:
+                launcher.share_targets(self.targets)
+        self.spawner = spawner  # optional dataset.TargetSpawner that adds targets while running.
+        self.profiler = None  # optional instrument.Profiler.
+        self.clock = Clock(dt)  # see checkpoint.py for saving and restoring a run.
+        self.grid = SpatialGrid() if collateral else None
+
+    @property
+    def ticks(self):
+        return self.clock.tick
+
+    @property
+    def running(self):
+        return bool(self.targets) or (self.spawner is not None and not self.spawner.exhausted)
+
+    @property
+    def kills(self):
+        return sum(launcher.kills for launcher in self.launchers)
+
+    @property
+    def misses(self):
+        return sum(launcher.misses for launcher in self.launchers)
+
+    def add_targets(self, pos, vel):
+        added = self.targets.add(pos, vel)
+        for launcher in self.launchers:
+            launcher.bearing_index.add(added)
+
+    def set_velocities(self, indices, vel):
+        """Changes the velocities of targets. The bearing indices planned how long they stay in their bins with the
+        old velocities, so they are re-binned straight away."""
+        self.targets.vel[indices] = vel
+        for launcher in self.launchers:
+            launcher.bearing_index.rebin(indices)
+
+    def step(self, report=True):
+        """One tick. With report False the caller ends the tick on the profiler, after drawing for example."""
+        profiler = self.profiler
+        if profiler is not None:
+            started = perf_counter()
+        if self.spawner is not None:
+            self.add_targets(*self.spawner.spawn())
+        self.targets.move()
+        for launcher in self.launchers:
+            launcher.bearing_index.advance()
+        if self.grid is not None and any(len(launcher.flights) for launcher in self.launchers):
+            self.grid.build(self.targets)
+        if profiler is not None:
+            started = profiler.lap('motion', started)
+        for launcher in self.launchers:
+            launcher.resolve_flights(self.grid)
+        if profiler is not None:
+            started = profiler.lap('flights', started)
+        sightings = [launcher.sweep() for launcher in self.launchers]
+        if profiler is not None:
+            started = profiler.lap('scan', started)
+        # only shots that can be taken go up for assignment, so a launcher never gets a target it cannot hit.
+        shots = [launcher.reachable(*seen) for launcher, seen in zip(self.launchers, sightings)]
+        for launcher, shot in self.assign(shots):
+            self.launchers[launcher].fire(*shot)
+        self.clock.advance()
+        if profiler is not None:
+            profiler.lap('aim', started)
+            if report:
+                profiler.end_tick(self)
+
+    def flush_events(self):
+        for log in {id(launcher.events): launcher.events for launcher in self.launchers}.values():
+            if log is not None:
+                log.flush()
+
+    def assign(self, sightings):
+        """Greedy assignment of targets to launchers, nearest intercept first.
+
+        sightings holds the (targets, bearings, launch velocities, frames of impact) each launcher can hit,
+        see TomatoLauncher.reachable(). The cost of every launcher and target pair is the mean speed a tomato needs
+        to meet the target, worked out for all pairs in one go.
+        Returns (launcher number, (target, bearing, launch velocity, frame of impact)) pairs.
+        """
+        owners = np.concatenate([np.full(len(found), number) for number, (found, *_) in enumerate(sightings)])
+        if len(owners) == 0:
+            return []
+        found, target_angles, velocity, impact = (np.concatenate(column) for column in zip(*sightings))
+        positions = np.array([launcher.position for launcher in self.launchers])
+        flight_times = np.array([launcher.flight_time for launcher in self.launchers], dtype=float)[owners]
+        meeting_points = self.targets.pos[found] + self.targets.vel[found] * flight_times[:, None]
+        cost = np.linalg.norm(meeting_points - positions[owners], axis=1) / flight_times
+        # a pair that comes first for both its launcher and its target in cost order is what greedy would pick,
+        # so take all of those at once and repeat with what is left.
+        order = np.argsort(cost, kind='stable')
+        assigned = []
+        while len(order):
+            first_of_launcher = np.zeros(len(order), dtype=bool)
+            first_of_launcher[np.unique(owners[order], return_index=True)[1]] = True
+            first_of_target = np.zeros(len(order), dtype=bool)
+            first_of_target[np.unique(found[order], return_index=True)[1]] = True
+            chosen = order[first_of_launcher & first_of_target]
+            assigned += [(launcher, (hit, target_angle, tomato_velocity, frame))
+                         for launcher, hit, target_angle, tomato_velocity, frame
+                         in zip(owners[chosen].tolist(), found[chosen].tolist(), target_angles[chosen].tolist(),
+                                velocity[chosen], impact[chosen].tolist())]
+            order = order[~np.isin(owners[order], owners[chosen]) & ~np.isin(found[order], found[chosen])]
+        return assigned
+
+    def run(self, max_ticks=None):
+        """Steps until every target is destroyed or max_ticks is reached."""
+        while self.running and (max_ticks is None or self.ticks < max_ticks):
+            self.step()
+        self.flush_events()
+        return self
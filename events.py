@@ -0,0 +1,141 @@
+# structured event log. events are packed into a fixed size in-memory ring buffer of numpy records
+# and written out to the sinks in batches, so logging a long run costs a few array writes per tick
+# instead of a print per event.
+import json
+import numpy as np
+
+# kinds of events.
+SWEEP, TARGET, SHOT, HIT, MISS = range(5)
+names = ('sweep', 'target', 'shot', 'hit', 'miss')
+# what a, b and c hold for each kind.
+fields = (('old_angle', 'new_angle'), ('angle',), ('vx', 'vy', 'vz'), ('distance',), ('distance',))
+
+# verbosity levels. an event is kept when its level is at most the verbosity of the log.
+OFF, HITS, SHOTS, SWEEPS = range(4)
+levels = (SWEEPS, SHOTS, SHOTS, HITS, HITS)
+
+record = np.dtype([('tick', 'i8'), ('kind', 'i1'), ('target', 'i8'), ('a', 'f8'), ('b', 'f8'), ('c', 'f8')])
+
+
+class EventLog:
+    """Ring buffer of event records. With sinks it is flushed to them whenever it fills up,
+    without sinks it just keeps the latest capacity events."""
+    def __init__(self, sinks=(), verbosity=SHOTS, capacity=1 << 16):
+        self.sinks = list(sinks)
+        self.verbosity = verbosity
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=record)
+        self.next = 0  # where the next record goes.
+        self.count = 0  # records in the buffer.
+
+    def wants(self, kind):
+        return levels[kind] <= self.verbosity
+
+    def emit(self, kind, tick, target=-1, a=np.nan, b=np.nan, c=np.nan):
+        if levels[kind] > self.verbosity:
+            return
+        if self.count == self.capacity and self.sinks:
+            self.flush()
+        self.buffer[self.next] = (tick, kind, target, a, b, c)
+        self.next = (self.next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def emit_many(self, kind, tick, targets, a=np.nan, b=np.nan, c=np.nan):
+        """One event per target, a, b and c may be arrays along targets."""
+        if levels[kind] > self.verbosity or len(targets) == 0:
+            return
+        records = np.empty(len(targets), dtype=record)
+        records['tick'] = tick
+        records['kind'] = kind
+        records['target'] = targets
+        records['a'], records['b'], records['c'] = a, b, c
+        self.write(records)
+
+    def write(self, records):
+        while len(records):
+            if self.count == self.capacity and self.sinks:
+                self.flush()
+            chunk = records[:self.capacity - self.next]
+            self.buffer[self.next:self.next + len(chunk)] = chunk
+            self.next = (self.next + len(chunk)) % self.capacity
+            self.count = min(self.count + len(chunk), self.capacity)
+            records = records[len(chunk):]
+
+    def records(self):
+        """Buffered records, oldest first."""
+        if self.count < self.capacity:
+            return self.buffer[self.next - self.count:self.next]
+        return np.concatenate([self.buffer[self.next:], self.buffer[:self.next]])
+
+    def flush(self):
+        if self.count and self.sinks:
+            records = self.records()
+            for sink in self.sinks:
+                sink.write(records)
+            self.next = 0
+            self.count = 0
+
+    def close(self):
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+
+
+class JsonlSink:
+    """One json object per event."""
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def write(self, records):
+        lines = []
+        for tick, kind, target, *values in records.tolist():
+            event = {'tick': tick, 'event': names[kind]}
+            if target >= 0:
+                event['target'] = target
+            event.update(zip(fields[kind], values))
+            lines.append(json.dumps(event) + '\n')
+        self.file.writelines(lines)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class BinarySink:
+    """Raw records, read them back with np.fromfile(path, dtype=events.record)."""
+    def __init__(self, path):
+        self.file = open(path, 'ab')
+
+    def write(self, records):
+        records.tofile(self.file)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ConsoleSink:
+    """The colored console messages."""
+    def __init__(self):
+        import colorama
+        colorama.init()
+        self.colorama = colorama
+
+    def write(self, records):
+        fore, style = self.colorama.Fore, self.colorama.Style
+        for tick, kind, target, a, b, c in records.tolist():
+            if kind == SWEEP:
+                print(fore.LIGHTGREEN_EX + f'checking between angles ' + fore.YELLOW + f'{a}'
+                      + fore.LIGHTGREEN_EX + ' and ' + fore.YELLOW + f'{b}' + style.RESET_ALL)
+            elif kind == TARGET:
+                print(fore.CYAN + f'found target ' + fore.YELLOW + f'@{a}' + style.RESET_ALL)
+            elif kind == SHOT:
+                print(fore.LIGHTRED_EX + f'Taking shot. Tomato velocity is '
+                      + fore.LIGHTWHITE_EX + f'{np.array([a, b, c])}' + style.RESET_ALL)
+            elif kind == HIT:
+                print(f'Tomato hit target with positional difference of {a}')
+            else:
+                print(fore.RED + f'Tomato missed target by {a}' + style.RESET_ALL)
+
+    def close(self):
+        pass
@@ -0,0 +1,116 @@
+# tomatoes in the air. they are all stepped together as arrays once per tick,
+# so the launcher keeps sweeping and shooting while earlier tomatoes are still flying.
+# the frame of impact is known at launch (see intercept.py), so a tomato is only checked against its target
+# on that frame instead of every frame of its flight.
+# with a spatial grid, tomatoes are also checked every frame against whatever other targets they pass close to.
+import numpy as np
+
+
+class FlightScheduler:
+    """Every tomato a launcher has in the air: launch velocity, target, frames since launch and frame of impact."""
+    def __init__(self, launcher):
+        self.launcher = launcher
+        self.velocity = np.empty((0, 3))
+        self.target = np.empty(0, dtype=np.int64)
+        self.age = np.empty(0, dtype=np.int64)  # frames since launch.
+        self.impact = np.empty(0, dtype=np.int64)  # frame at which the tomato meets its target.
+        self.pending = []  # (velocity, target, impact) launched this tick, joined in at the next step.
+
+    def __len__(self):
+        return len(self.target) + len(self.pending)
+
+    def launch(self, velocity, target, impact):
+        self.pending.append((velocity, target, impact))
+
+    @property
+    def positions(self):
+        """Where every tomato is now. Only needed for drawing, stepping does not use it."""
+        return self.launcher.trajectory(self.velocity, self.age)
+
+    def step(self, grid=None):
+        """Moves every tomato one frame.
+
+        Returns (hit targets, hit distances, missed targets, miss distances, released targets). With a
+        spatial_grid.SpatialGrid built on this tick's targets, a tomato that passes within hit_distance of another
+        target on the way hits that one instead, and the target it was aimed at is released.
+        """
+        if self.pending:
+            velocity, target, impact = zip(*self.pending)
+            self.velocity = np.concatenate([self.velocity, velocity])
+            self.target = np.concatenate([self.target, target])
+            self.impact = np.concatenate([self.impact, impact])
+            self.age = np.concatenate([self.age, np.zeros(len(self.pending), dtype=np.int64)])
+            self.pending = []
+        if grid is not None and len(self.target):
+            collateral, collateral_distance, spent = self.collateral(grid)
+        else:
+            collateral, collateral_distance = np.empty(0, dtype=np.int64), np.empty(0)
+            spent = np.zeros(len(self.target), dtype=bool)
+        self.age += 1
+        targets = self.launcher.targets
+        due = (self.age >= self.impact) & ~spent
+        # something else got the target first. no need to keep the tomato around until impact.
+        lost = ~due & ~spent & ~targets.alive[self.target]
+        landed = self.target[due]
+        distance = np.linalg.norm(self.launcher.trajectory(self.velocity[due], self.age[due])
+                                  - targets.pos[landed], axis=1)
+        hit = distance < self.launcher.hit_distance
+        result = (np.concatenate([landed[hit], collateral]), np.concatenate([distance[hit], collateral_distance]),
+                  np.concatenate([landed[~hit], self.target[lost]]),
+                  np.concatenate([distance[~hit], np.full(np.count_nonzero(lost), np.nan)]),
+                  self.target[spent])
+        keep = ~(due | lost | spent)
+        self.velocity = self.velocity[keep]
+        self.target = self.target[keep]
+        self.age = self.age[keep]
+        self.impact = self.impact[keep]
+        return result
+
+    def collateral(self, grid, chunk_size=1 << 12):
+        """Targets other than their own that tomatoes pass within hit_distance of during the coming frame.
+
+        Returns (targets hit, distances, mask of the tomatoes that hit something). A tomato hits the nearest one.
+        Tomatoes are checked chunk_size at a time, which bounds the memory it takes.
+        """
+        start = self.launcher.trajectory(self.velocity, self.age)
+        end = self.launcher.trajectory(self.velocity, self.age + 1)
+        passes = [self.passes(grid, start[first:first + chunk_size], end[first:first + chunk_size],
+                              self.target[first:first + chunk_size], first)
+                  for first in range(0, len(self.target), chunk_size)]
+        tomato, target, distance = (np.concatenate(arrays) for arrays in zip(*passes))
+        order = np.lexsort((distance, tomato))
+        first = order[np.flatnonzero(np.diff(tomato[order], prepend=-1))]
+        spent = np.zeros(len(self.target), dtype=bool)
+        spent[tomato[first]] = True
+        return target[first], distance[first], spent
+
+    def passes(self, grid, start, end, aimed_at, first=0):
+        """(tomato, target, distance) of every target but the one aimed_at that tomatoes moving from start to end
+        come within hit_distance of. Tomatoes are numbered from first."""
+        targets = self.launcher.targets
+        hit_distance = self.launcher.hit_distance
+        # the path of each tomato is cut into pieces no longer than a cell. a target that comes within hit_distance
+        # of the tomato during the frame is never further than radius from the middle of one of the pieces
+        # at the end of the frame, so looking around the pieces only needs the neighbouring cells.
+        path = end - start
+        pieces = np.maximum(np.ceil(np.linalg.norm(path, axis=1) / grid.cell_size), 1).astype(np.int64)
+        tomato = np.repeat(np.arange(len(pieces)), pieces)
+        piece = np.arange(len(tomato)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        middles = start[tomato] + path[tomato] * ((piece + 0.5) / pieces[tomato])[:, None]
+        radius = grid.cell_size / 2 + grid.reach + hit_distance
+        near_piece, target = grid.near(middles, radius)
+        pairs = np.unique(tomato[near_piece] * len(targets.pos) + target)
+        tomato, target = pairs // len(targets.pos), pairs % len(targets.pos)
+        # the grid was built before any launcher resolved this tick, a target another launcher already got is gone.
+        other = (target != aimed_at[tomato]) & targets.alive[target]
+        tomato, target = tomato[other], target[other]
+        # closest approach during the frame, with both moving in straight lines. the targets already moved.
+        target_end = targets.pos[target]
+        target_start = target_end - targets.vel[target]
+        gap = start[tomato] - target_start
+        closing = path[tomato] - (target_end - target_start)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            along = np.nan_to_num(np.clip(-np.sum(gap * closing, axis=1) / np.sum(closing ** 2, axis=1), 0, 1))
+        distance = np.linalg.norm(gap + along[:, None] * closing, axis=1)
+        close = distance < hit_distance
+        return tomato[close] + first, target[close], distance[close]
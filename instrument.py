@@ -0,0 +1,60 @@
+# per tick timing of the phases of the simulation. the engine and the renderer only call in here
+# when a profiler is attached, so leaving it off costs one attribute check per phase.
+from time import perf_counter
+
+phases = ('motion', 'flights', 'scan', 'aim', 'draw', 'log', 'sleep')
+
+
+class Profiler:
+    """Times every phase of every tick.
+
+    callback, if given, is called after every tick with a dict of that tick's phase times in seconds and the
+    counters. With summary_every, a summary of the mean phase times is printed every that many seconds.
+    """
+    def __init__(self, callback=None, summary_every=None):
+        self.callback = callback
+        self.summary_every = summary_every
+        self.totals = dict.fromkeys(phases, 0.0)  # seconds spent in each phase over the whole run.
+        self.current = dict.fromkeys(phases, 0.0)  # seconds spent in each phase in this tick.
+        self.ticks = 0
+        self.ticks_per_second = 0.0
+        self.window = dict.fromkeys(phases, 0.0)  # seconds spent in each phase since the last summary.
+        self.window_ticks = 0
+        self.window_start = perf_counter()
+
+    def lap(self, phase, started):
+        """Adds the time since started to phase and returns now, so laps can be chained."""
+        now = perf_counter()
+        self.current[phase] += now - started
+        return now
+
+    def end_tick(self, engine):
+        self.ticks += 1
+        self.window_ticks += 1
+        for phase, seconds in self.current.items():
+            self.totals[phase] += seconds
+            self.window[phase] += seconds
+        now = perf_counter()
+        if self.window_ticks and now > self.window_start:
+            self.ticks_per_second = self.window_ticks / (now - self.window_start)
+        stats = {'tick': engine.ticks,
+                 'phases': dict(self.current),
+                 'ticks_per_second': self.ticks_per_second,
+                 'hits': engine.kills,
+                 'misses': engine.misses,
+                 'targets_left': len(engine.targets)}
+        self.current = dict.fromkeys(phases, 0.0)
+        if self.callback is not None:
+            self.callback(stats)
+        if self.summary_every is not None and now - self.window_start >= self.summary_every:
+            print(self.summary(stats))
+            self.window = dict.fromkeys(phases, 0.0)
+            self.window_ticks = 0
+            self.window_start = now
+
+    def summary(self, stats):
+        """Mean milliseconds per tick of each phase since the last summary, and the counters."""
+        means = ' '.join(f'{phase} {seconds / self.window_ticks * 1000:.3f}ms'
+                         for phase, seconds in self.window.items())
+        return (f'tick {stats["tick"]}: {stats["ticks_per_second"]:.1f} ticks/s, {means}, '
+                f'{stats["hits"]} hits, {stats["misses"]} misses, {stats["targets_left"]} targets left')
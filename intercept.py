@@ -0,0 +1,25 @@
+# closed form intercepts, solved for every visible target at once.
+# the launcher aims so the tomato and the target meet after exactly flight_time frames.
+# targets move in straight lines and the trajectories are solutions of the equations of motion,
+# so where and when they meet is known at launch and nothing has to be polled frame by frame.
+import numpy as np
+
+
+def solve(launcher, target_pos, target_vel, max_speed=None):
+    """Aims launcher at every target (N x 3 positions and velocities).
+
+    Returns launch velocities (N x 3), frame of impact (N) and predicted miss distance (N).
+    With max_speed, launch velocities are scaled down to it and the miss distance says by how much they fall short.
+    """
+    target_pos = np.asarray(target_pos, dtype=float).reshape(-1, 3)
+    target_vel = np.asarray(target_vel, dtype=float).reshape(-1, 3)
+    # tomatoes land on whole frames, so a fractional flight time is aimed and checked at the nearest one.
+    frames = int(round(float(launcher.flight_time)))
+    impact = np.full(len(target_pos), frames, dtype=np.int64)
+    desired_target_pos = target_pos + target_vel * impact[:, None]
+    velocity = launcher.aim(desired_target_pos, frames)
+    if max_speed is not None:
+        speed = np.linalg.norm(velocity, axis=1)
+        velocity *= np.minimum(1, max_speed / np.maximum(speed, 1e-12))[:, None]
+    miss = np.linalg.norm(launcher.trajectory(velocity, impact) - desired_target_pos, axis=1)
+    return velocity, impact, miss
@@ -0,0 +1,118 @@
+# the loops that run over every target. each kernel has a numpy version, and a numba version in kernels_numba.py
+# that fuses the whole loop body into one pass and runs it on every core. both take and return the same arrays
+# so callers never know which one they got.
+# numba is opt in with use('numba'). every process that uses it pays for importing numba and loading the compiled
+# kernels, about half a second, which only pays off with hundreds of thousands of targets (see benchmark.py).
+# numba is only imported when a kernel is first called, so importing the simulation stays cheap.
+# call them through the module, kernels.bearings(...), so use() can swap them.
+# moving the targets is not in here, pos += vel is bound by memory bandwidth and numpy already runs at it.
+# python kernels.py checks that both backends agree.
+import importlib.util
+import sys
+import numpy as np
+
+
+def bearings_numpy(pos, indices, origin):
+    """Angle of the targets in indices around origin on xy plane, in degrees between 0 and 360."""
+    relative = pos[indices, 0:2] - origin[0:2]
+    return np.degrees(np.arctan2(relative[:, 1], relative[:, 0])) + 180
+
+
+def bin_bearings_numpy(pos, vel, indices, origin, bin_width, number_of_bins, margin, max_valid_ticks):
+    """Bearing bin of the targets in indices and the number of ticks each one is sure to stay near it.
+
+    A point at distance r that moves s away can turn at most asin(s / r) around the origin,
+    so it stays inside its bin plus the margin while s <= r * sin(drift).
+    """
+    relative = pos[indices, 0:2] - origin[0:2]
+    angles = np.degrees(np.arctan2(relative[:, 1], relative[:, 0])) + 180
+    bins = np.minimum((angles // bin_width).astype(np.int64), number_of_bins - 1)
+    edge = np.minimum(angles - bins * bin_width, (bins + 1) * bin_width - angles)
+    drift = np.radians(margin + np.maximum(edge, 0))
+    distance = np.hypot(relative[:, 0], relative[:, 1])
+    speed = np.hypot(vel[indices, 0], vel[indices, 1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valid = np.floor(distance * np.sin(drift) / speed)
+    valid[speed == 0] = max_valid_ticks
+    return bins, np.minimum(valid, max_valid_ticks).astype(np.int64)
+
+
+backends = {'numpy': (bearings_numpy, bin_bearings_numpy)}
+if importlib.util.find_spec('numba') is not None:
+    backends['numba'] = None  # imported and compiled on first use.
+current = 'numpy'
+
+
+def load(backend):
+    """The kernels of backend, 'numpy' or 'numba'."""
+    if backend not in backends:
+        raise ValueError(f'{backend} backend is not available, there is {", ".join(backends)}')
+    if backends[backend] is None:
+        try:
+            import kernels_numba
+        except ImportError:
+            # numba is installed but does not import, with an unsupported numpy for example.
+            del backends['numba']
+            return load('numpy')
+        backends[backend] = (kernels_numba.bearings, kernels_numba.bin_bearings)
+    return backends[backend]
+
+
+def use(backend, threads=None):
+    """Switches every kernel to backend. Falls back to numpy when numba turns out not to import.
+    threads caps the threads the numba kernels run on, one per process keeps a process pool from oversubscribing."""
+    global bearings, bin_bearings, current
+    bearings, bin_bearings = load(backend)
+    current = backend if backend in backends else 'numpy'
+    if current == 'numba' and threads is not None:
+        import numba
+        numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+
+
+# until use() is called, the first call to a kernel loads the current backend and puts its kernels in their place.
+def bearings(pos, indices, origin):
+    use(current)
+    return bearings(pos, indices, origin)
+
+
+def bin_bearings(pos, vel, indices, origin, bin_width, number_of_bins, margin, max_valid_ticks):
+    use(current)
+    return bin_bearings(pos, vel, indices, origin, bin_width, number_of_bins, margin, max_valid_ticks)
+
+
+def parity(number_of_targets=10 ** 5, seed=0):
+    """Runs every kernel of every backend on the same random targets and raises AssertionError where they disagree.
+
+    Angles may differ in the last bits between backends, so they are compared with a tolerance. A bearing that
+    lands within that tolerance of a bin edge may go to either bin, those targets are left out of the bin check.
+    """
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(-500, 500, (number_of_targets, 3)).astype('float32')
+    vel = rng.uniform(-1, 1, (number_of_targets, 3)).astype('float32')
+    vel[:10] = 0  # stationary targets take their own branch.
+    indices = rng.permutation(number_of_targets)[:number_of_targets // 2]
+    origin = np.array([12.5, -30, 0])
+    bin_width, number_of_bins, margin, max_valid_ticks = 2.0, 180, 4.0, 1 << 30
+    results = {}
+    for name in list(backends):
+        bearings_kernel, bin_kernel = load(name)
+        if name not in backends:
+            continue  # it did not import, load() fell back to numpy.
+        results[name] = (bearings_kernel(pos, indices, origin),
+                         *bin_kernel(pos, vel, indices, origin, bin_width, number_of_bins, margin, max_valid_ticks))
+    expected_angles, expected_bins, expected_valid = results['numpy']
+    for name, (angles, bins, valid) in results.items():
+        assert np.allclose(angles, expected_angles, rtol=0, atol=1e-9), f'{name} bearings differ from numpy'
+        away_from_edges = np.abs(expected_angles / bin_width - np.round(expected_angles / bin_width)) > 1e-9
+        assert np.array_equal(bins[away_from_edges], expected_bins[away_from_edges]), f'{name} bins differ from numpy'
+        assert np.all(np.abs(valid - expected_valid)[away_from_edges] <= 1), f'{name} valid ticks differ from numpy'
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        parity()
+    except AssertionError as error:
+        print(error)
+        sys.exit(1)
+    print(f'{", ".join(backends)} agree')
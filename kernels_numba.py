@@ -0,0 +1,34 @@
+# numba versions of the kernels in kernels.py, with the same signatures. only imported when they are used.
+import math
+import numba
+import numpy as np
+
+
+@numba.njit(parallel=True, cache=True)
+def bearings(pos, indices, origin):
+    angles = np.empty(len(indices))
+    for k in numba.prange(len(indices)):
+        i = indices[k]
+        angles[k] = math.degrees(math.atan2(pos[i, 1] - origin[1], pos[i, 0] - origin[0])) + 180
+    return angles
+
+
+@numba.njit(parallel=True, cache=True)
+def bin_bearings(pos, vel, indices, origin, bin_width, number_of_bins, margin, max_valid_ticks):
+    bins = np.empty(len(indices), dtype=np.int64)
+    valid = np.empty(len(indices), dtype=np.int64)
+    for k in numba.prange(len(indices)):
+        i = indices[k]
+        x = pos[i, 0] - origin[0]
+        y = pos[i, 1] - origin[1]
+        angle = math.degrees(math.atan2(y, x)) + 180
+        b = min(int(angle // bin_width), number_of_bins - 1)
+        bins[k] = b
+        edge = max(min(angle - b * bin_width, (b + 1) * bin_width - angle), 0.0)
+        speed = math.hypot(vel[i, 0], vel[i, 1])
+        if speed == 0:
+            valid[k] = max_valid_ticks
+        else:
+            valid[k] = min(math.floor(math.hypot(x, y) * math.sin(math.radians(margin + edge)) / speed),
+                           max_valid_ticks)
+    return bins, valid
@@ -0,0 +1,58 @@
+# these are pure math. Solutions of the equation of motion of a tomato under a constant acceleration (gravity),
+# with or without linear drag. Both models have the same shape:
+#     position = x_0 + v_0 * c1(t) + a * c2(t)
+# so each model only has to supply c1 and c2. They are computed once per time and reused for every axis.
+# Everything broadcasts like a numpy ufunc, over times, targets and launchers alike.
+import functools
+import numpy as np
+
+
+def ballistic_coefficients(t):
+    """c1 and c2 when there is only gravity."""
+    t = np.asarray(t, dtype=float)
+    return t, 0.5 * t ** 2
+
+
+def drag_coefficients(t, b, m):
+    """c1 and c2 when there is linear drag b on a tomato of mass m. They go to the ballistic ones as b goes to 0."""
+    t = np.asarray(t, dtype=float)
+    k = m / b
+    decay = -np.expm1(-t / k)  # 1 - e^(-b * t / m), the one exponential both coefficients need.
+    c1 = k * decay
+    return c1, k * (t - c1)
+
+
+def position(x_0, v_0, a, c1, c2):
+    """Where a tomato launched from x_0 with velocity v_0 is, given the coefficients of its flight time."""
+    return x_0 + v_0 * c1 + a * c2
+
+
+def initial_velocity(x_0, x_f, a, c1, c2):
+    """Launch velocity that takes a tomato from x_0 to x_f, the inverse of position()."""
+    return (x_f - x_0 - a * c2) / c1
+
+
+# tables of c1 and c2 for every whole frame of a flight. launchers ask for the same frames with the same parameters
+# over and over, so the tables are cached, and shared by every launcher that has the same parameters.
+models = {'ballistic': ballistic_coefficients, 'drag': drag_coefficients}
+
+
+@functools.lru_cache(maxsize=64)
+def coefficient_table(model, last_frame, *parameters):
+    """c1 and c2 of model for the frames 0 to last_frame, read only. The least recently used tables are dropped."""
+    c1, c2 = (np.array(c, dtype=float) for c in models[model](np.arange(last_frame + 1), *parameters))
+    c1.flags.writeable = False
+    c2.flags.writeable = False
+    return c1, c2
+
+
+def cached_coefficients(frames, last_frame, model, *parameters):
+    """c1 and c2 of model after frames, looked up in the table up to last_frame.
+    Frames that are not whole numbers or fall outside the table are computed instead."""
+    frames = np.asarray(frames)
+    index = frames.astype(np.int64, copy=False)
+    if index.size and (index.min() < 0 or index.max() > last_frame
+                       or (frames.dtype.kind != 'i' and not np.array_equal(index, frames))):
+        return models[model](frames, *parameters)
+    c1, c2 = coefficient_table(model, last_frame, *parameters)
+    return c1[index], c2[index]
@@ -0,0 +1,97 @@
+# pygame front end. it is optional, the engine runs fine without it.
+# only the parts of the screen that changed since the last frame are cleared and pushed to the display,
+# and with fps set the simulation keeps ticking between frames instead of waiting for them.
+import numpy as np
+import settings as st
+from time import sleep, perf_counter
+import pygame as pg
+import sys
+
+
+# initialize Simulation class to handle pygame
+class Simulation:
+    """Attaches to an engine and draws it at a watchable pace. It is top view."""
+    def __init__(self, engine, tick_delay=None, fps=None, full_update_limit=2000):
+        pg.init()
+        self.clock = pg.time.Clock()
+        self.screen = pg.display.set_mode(np.array(st.screen_size, dtype='int16'))
+        self.screen.fill(pg.Color('black'))
+        pg.display.update()
+        self.engine = engine
+        # seconds to wait between sweeps. by default the simulation clock runs in real time,
+        # or as fast as it can between frames when fps is set.
+        if tick_delay is None:
+            tick_delay = engine.clock.dt if fps is None else 0
+        self.tick_delay = tick_delay
+        self.fps = fps  # draw at most this many frames per second. None draws every tick.
+        self.full_update_limit = full_update_limit  # above this many dirty rects, update the whole display.
+        self.line_length = np.hypot(*st.screen_size)  # long enough to leave the screen from anywhere on it.
+        self.dirty = []  # rects drawn in the last frame, they get cleared in the next one.
+        self.last_frame = -np.inf
+
+    def update(self):
+        while self.engine.running:
+            profiler = self.engine.profiler
+            self.handle_events()
+            if self.tick_delay:
+                started = perf_counter()
+                sleep(self.tick_delay)
+                if profiler is not None:
+                    profiler.lap('sleep', started)
+            self.engine.step(report=False)
+            started = perf_counter()
+            self.engine.flush_events()
+            if profiler is not None:
+                started = profiler.lap('log', started)
+            if self.fps is None or started - self.last_frame >= 1 / self.fps:
+                self.last_frame = started
+                self.draw()
+                if profiler is not None:
+                    profiler.lap('draw', started)
+            if profiler is not None:
+                profiler.end_tick(self.engine)
+
+    @staticmethod
+    def handle_events():
+        for event in pg.event.get():
+            if event.type == pg.QUIT:
+                pg.quit()
+                sys.exit()
+
+    def draw_circles(self, centers, radii, color):
+        """Draws circles from integer arrays of centers (N x 2) and radii (N), returns their rects."""
+        circle = pg.draw.circle
+        return [circle(self.screen, color, center, radius)
+                for center, radius in zip(centers.tolist(), radii.tolist())]
+
+    def draw(self):
+        """Draw the visualization. It is top view."""
+        black = pg.Color('black')
+        if len(self.dirty) > self.full_update_limit:
+            self.screen.fill(black)  # one fill is cheaper than thousands of small ones.
+        else:
+            for rect in self.dirty:
+                self.screen.fill(black, rect)
+
+        targets = self.engine.targets
+        alive = targets.pos[targets.alive]
+        radii = np.maximum(((alive[:, 2] + 150) / 15).astype(np.int32), 1)
+        drawn = self.draw_circles(alive[:, 0:2].astype(np.int32), radii, (255, 255, 255))
+        for launcher in self.engine.launchers:
+            tomatoes = launcher.flights.positions
+            drawn += self.draw_circles(tomatoes[:, 0:2].astype(np.int32),
+                                       np.full(len(tomatoes), 3, dtype=np.int32), (255, 0, 0))
+        for launcher in self.engine.launchers:
+            position = launcher.position
+            start_pos = position[0:2].astype(np.int32)
+            for direction, color in ((launcher.nozzle_dir, (255, 0, 0)), (launcher.old_dir, (0, 255, 0))):
+                end_pos = position[0:2] + self.line_length * direction / np.linalg.norm(direction)
+                drawn.append(pg.draw.line(self.screen, color, start_pos, end_pos, 1))
+            drawn.append(pg.draw.circle(self.screen, (255, 255, 0), start_pos, 10))
+
+        rects = self.dirty + drawn
+        if len(rects) > self.full_update_limit:
+            pg.display.update()
+        else:
+            pg.display.update(rects)
+        self.dirty = drawn
@@ -4,5 +4,5 @@ import numpy as np
 number_of_targets = 100
 max_velocity = 1
 gravity = -2
-
+screen_size = [960, 640]
 
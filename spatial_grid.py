@@ -0,0 +1,79 @@
+# uniform grid over the 3d positions of the targets, for finding the targets near a set of points without
+# comparing every point with every target. the alive targets are sorted by the key of their cell once per tick,
+# then a query looks up the cells around each point with one searchsorted, so building is O(targets log targets)
+# and a query costs about O(points + targets found).
+import itertools
+import numpy as np
+
+# cell coordinates are packed into one int64 key, 21 bits per axis.
+key_bits = 21
+key_offset = 1 << (key_bits - 1)
+key_mask = (1 << key_bits) - 1
+
+
+def cell_keys(cells):
+    """One int64 key per row of integer cell coordinates (N x 3)."""
+    cells = (cells + key_offset) & key_mask
+    return (cells[..., 0] << (2 * key_bits)) | (cells[..., 1] << key_bits) | cells[..., 2]
+
+
+class SpatialGrid:
+    """Cells of cell_size holding the alive targets of a TargetStore. Call build() after the targets moved."""
+    def __init__(self, cell_size=8.0):
+        self.cell_size = cell_size
+        self.targets = None
+        self.indices = np.empty(0, dtype=np.int64)  # targets, sorted by the key of their cell.
+        self.keys = np.empty(0, dtype=np.int64)  # key of every cell that has targets, sorted.
+        self.starts = np.empty(0, dtype=np.int64)  # where each of those cells starts in indices.
+        self.ends = np.empty(0, dtype=np.int64)
+        self.reach = 0.0  # no target moved further than this in the last tick.
+
+    def cells(self, points):
+        return np.floor(points / self.cell_size).astype(np.int64)
+
+    def build(self, targets):
+        self.targets = targets
+        indices = targets.alive_indices()
+        keys = cell_keys(self.cells(targets.pos[indices]))
+        order = np.argsort(keys)  # the order inside a cell does not matter.
+        self.indices, keys = indices[order], keys[order]
+        starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))[:len(keys)]
+        self.keys = keys[starts]
+        self.starts = starts
+        self.ends = np.append(starts[1:], len(keys))[:len(starts)]
+        # bounded by the fastest speed along each axis, cheaper than the norm of every velocity.
+        self.reach = float(np.linalg.norm(np.abs(targets.vel[indices]).max(axis=0))) if len(indices) else 0.0
+
+    def near(self, points, radius, chunk_size=1 << 15):
+        """(point, target) pairs of every target in the cells within radius of points (K x 3).
+
+        A superset of the targets within radius, filter it by the distance that matters to the caller.
+        Points are looked up chunk_size at a time, which bounds the memory a query takes.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if len(points) == 0 or len(self.keys) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        span = int(np.ceil(radius / self.cell_size))
+        offsets = np.array(list(itertools.product(range(-span, span + 1), repeat=3)), dtype=np.int64)
+        pairs = [self.lookup(points[start:start + chunk_size], offsets, start)
+                 for start in range(0, len(points), chunk_size)]
+        return np.concatenate([point for point, _ in pairs]), np.concatenate([target for _, target in pairs])
+
+    def lookup(self, points, offsets, first):
+        keys = cell_keys(self.cells(points)[:, None, :] + offsets[None, :, :]).ravel()
+        slots = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = np.flatnonzero(self.keys[slots] == keys)
+        starts, ends = self.starts[slots[found]], self.ends[slots[found]]
+        counts = ends - starts
+        # every (point, cell) lookup that hit turns into a run of the targets of that cell.
+        point_of_pair = np.repeat(first + found // len(offsets), counts)
+        run_starts = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return point_of_pair, self.indices[run_starts + np.arange(counts.sum())]
+
+    def within(self, points, radius):
+        """(point, target, distance) of every alive target within radius of points, as of the last build."""
+        point_of_pair, target = self.near(points, radius)
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        distance = np.linalg.norm(points[point_of_pair] - self.targets.pos[target], axis=1)
+        close = distance < radius
+        return point_of_pair[close], target[close], distance[close]
@@ -0,0 +1,61 @@
+# targets are stored as structure of arrays instead of one object per target.
+# every operation here is one vectorized numpy call over the whole population.
+import numpy as np
+
+
+class TargetStore:
+    """Contiguous N x 3 positions and velocities plus an alive mask."""
+    def __init__(self, pos, vel):
+        self.pos = np.ascontiguousarray(pos, dtype='float32')
+        self.vel = np.ascontiguousarray(vel, dtype='float32')
+        self.alive = np.ones(len(self.pos), dtype=bool)
+        self.engaged = np.zeros(len(self.pos), dtype=bool)  # a tomato is already flying at these.
+        self.count = len(self.pos)  # number of targets still alive.
+        self.size = len(self.pos)  # rows in use. the arrays may have room for more.
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, capacity):
+        """Grows the arrays to hold capacity targets. Rows past size stay dead."""
+        for name in ('pos', 'vel', 'alive', 'engaged'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, pos, vel):
+        """Appends targets and returns their indices."""
+        start, end = self.size, self.size + len(pos)
+        if end > len(self.pos):
+            self.reserve(max(end, 2 * len(self.pos)))
+        self.pos[start:end] = pos
+        self.vel[start:end] = vel
+        self.alive[start:end] = True
+        self.count += end - start
+        self.size = end
+        return np.arange(start, end)
+
+    def move(self):
+        # dead targets move too. that is cheaper than masking and they are never looked at again.
+        self.pos += self.vel
+
+    def bearings(self, origin):
+        """Angle of every target around origin on xy plane, in degrees between 0 and 360."""
+        relative = self.pos[:, 0:2] - origin[0:2]
+        return np.degrees(np.arctan2(relative[:, 1], relative[:, 0])) + 180
+
+    def kill(self, index):
+        if self.alive[index]:
+            self.alive[index] = False
+            self.count -= 1
+
+    def alive_indices(self):
+        return np.flatnonzero(self.alive)
+
+
+def sector_mask(angles, min_angle, max_angle):
+    """True for the angles that are between min_angle and max_angle. Wide sectors wrap around 0/360."""
+    if np.abs(max_angle - min_angle) < 10:
+        return (min_angle <= angles) & (angles <= max_angle)
+    return (max_angle <= angles) | (angles <= min_angle)
@@ -0,0 +1,5 @@
+# the modules of the simulation live at the top of the repository, not in a package.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,30 @@
+import json
+import pytest
+import batch
+import kernels
+
+
+def test_finished_runs_are_skipped_whatever_their_order(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    common = {'number_of_targets': 5, 'max_ticks': 20}
+    batch.run_batch(batch.grid([0, 1], damping=[0.1]), path, workers=1, **common)
+    # the same runs in another order, one new one, and a changed max_ticks that makes them all different runs.
+    batch.run_batch(batch.grid([2, 1, 0], damping=[0.1]), path, workers=1, **common)
+    batch.run_batch(batch.grid([0], damping=[0.1]), path, workers=1, number_of_targets=5, max_ticks=30)
+    records = [json.loads(line) for line in open(path)]
+    assert [record['seed'] for record in records] == [0, 1, 2, 0]
+    assert len({record['key'] for record in records}) == 4
+    assert all('error' not in record for record in records)
+
+
+def test_fractional_flight_time_still_hits():
+    assert batch.grid([0], flight_time=[10.5, 12.0]) == [{'flight_time': 10, 'seed': 0}, {'flight_time': 12, 'seed': 0}]
+    # run() takes it as given, the intercepts are aimed at the frame the tomato lands on.
+    assert batch.run(0, 'drag', 20, 1000, flight_time=10.5)['kills'] == 20
+
+
+@pytest.mark.skipif('numba' not in kernels.backends, reason='numba is not installed')
+def test_workers_use_the_given_backend(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    batch.run_batch(batch.grid([0]), path, workers=1, backend='numba', number_of_targets=5, max_ticks=20)
+    assert 'error' not in json.loads(open(path).readline())
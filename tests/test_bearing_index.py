@@ -0,0 +1,35 @@
+import numpy as np
+from bearing_index import BearingIndex
+from targets import TargetStore, sector_mask
+
+
+def test_query_matches_brute_force_while_targets_move_die_and_appear():
+    rng = np.random.default_rng(1)
+    origin = np.array([480.0, 320, 0])
+    store = TargetStore(rng.uniform(-300, 300, (10000, 3)) + origin, rng.uniform(-3, 3, (10000, 3)))
+    index = BearingIndex(store, origin)
+    direction = np.array([1.0, 0])
+    speed = -0.05  # radians per tick, like the launchers. a full turn takes about 126 ticks.
+    rotation = np.array([[np.cos(speed), np.sin(speed)], [-np.sin(speed), np.cos(speed)]])
+    seam_crossings = 0
+    for tick in range(600):
+        old_angle = np.degrees(np.arctan2(direction[1], direction[0])) + 180
+        direction = rotation @ direction
+        new_angle = np.degrees(np.arctan2(direction[1], direction[0])) + 180
+        min_angle, max_angle = min(old_angle, new_angle), max(old_angle, new_angle)
+        seam_crossings += max_angle - min_angle >= 10
+        store.move()
+        index.advance()
+        if tick % 50 == 0:
+            index.add(store.add(rng.uniform(-300, 300, (100, 3)) + origin, rng.uniform(-3, 3, (100, 3))))
+        if tick % 70 == 0:
+            changed = rng.integers(0, store.size, 200)
+            store.vel[changed] = rng.uniform(-3, 3, (len(changed), 3))
+            index.rebin(changed)
+        found, angles = index.query(min_angle, max_angle)
+        expected = np.flatnonzero(store.alive & sector_mask(store.bearings(origin), min_angle, max_angle))
+        np.testing.assert_array_equal(found, expected)
+        np.testing.assert_allclose(angles, store.bearings(origin)[expected])
+        for target in np.concatenate([found, rng.integers(0, store.size, 5)]):
+            store.kill(target)
+    assert seam_crossings >= 4
@@ -0,0 +1,46 @@
+import numpy as np
+import checkpoint
+import dataset
+import engine
+import launcher_with_drag
+
+
+def simulation():
+    """Two launchers sharing targets, a spawner and collateral hits, a few of which happen in the first 300 ticks."""
+    targets = dataset.random_targets(np.random.default_rng(0), 300)
+    launchers = [launcher_with_drag.TomatoLauncher(targets),
+                 launcher_with_drag.TomatoLauncher(targets, position=[300, 250, 0])]
+    return engine.Engine(launchers, spawner=dataset.TargetSpawner(0.5, total=200, seed=1), collateral=True)
+
+
+def state(simulation):
+    """Everything that has to come out the same, as arrays."""
+    targets = simulation.targets
+    arrays = [targets.pos[:targets.size], targets.vel[:targets.size], targets.alive[:targets.size],
+              targets.engaged[:targets.size], [simulation.ticks, simulation.spawner.spawned],
+              simulation.spawner.rng.random(3)]
+    for launcher in simulation.launchers:
+        flights = launcher.flights
+        arrays += [[launcher.kills, launcher.misses, launcher.landed_misses, launcher.miss_distance_total],
+                   launcher.nozzle_dir, flights.velocity, flights.target, flights.age, flights.impact]
+    return arrays
+
+
+def test_restored_run_ends_like_an_unbroken_one(tmp_path):
+    unbroken = simulation()
+    for _ in range(300):
+        unbroken.step()
+
+    broken = simulation()
+    # stop between two ticks with tomatoes in the air and shots of the last tick still pending.
+    while broken.ticks < 150 or not broken.launchers[0].flights.pending:
+        broken.step()
+    assert any(len(launcher.flights.target) for launcher in broken.launchers)
+    checkpoint.save(broken, tmp_path / 'run.npz')
+    restored = checkpoint.load(simulation(), tmp_path / 'run.npz')
+    while restored.ticks < 300:
+        restored.step()
+
+    assert unbroken.kills > 0 and 0 < unbroken.spawner.spawned < 200
+    for expected, actual in zip(state(unbroken), state(restored), strict=True):
+        np.testing.assert_array_equal(actual, expected)
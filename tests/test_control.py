@@ -0,0 +1,53 @@
+import asyncio
+import json
+import numpy as np
+import control
+import engine
+import launcher_with_drag
+
+bad_commands = [{'type': 'velocity', 'targets': [10 ** 6], 'vel': [[0, 0, 0]]},
+                {'type': 'velocity', 'targets': [0, 1], 'vel': [[0, 0, 0]]},
+                {'type': 'velocity', 'targets': [0.5], 'vel': [[0, 0, 0]]},
+                {'type': 'spawn', 'pos': [[1, 2]], 'vel': [[0, 0, 0]]},
+                {'type': 'spawn', 'pos': [[1, 2, np.nan]], 'vel': [[0, 0, 0]]},
+                {'type': 'spawn', 'vel': [[0, 0, 0]]},
+                {'type': 'teleport'},
+                'spawn']
+
+
+def controller():
+    targets = (np.array([[300.0, 200, 0], [500, 300, 0]]), np.zeros((2, 3)))
+    return control.Controller(engine.Engine(launcher_with_drag.TomatoLauncher(targets)))
+
+
+def test_bad_commands_are_reported_and_do_not_stop_the_run():
+    async def run():
+        simulation = controller()
+        subscription = simulation.subscribe()
+        for command in bad_commands:
+            await simulation.commands.put(command)
+        await simulation.commands.put({'type': 'spawn', 'pos': [[400, 300, 0]], 'vel': [[0, 0, 0]]})
+        await simulation.run(max_ticks=5)
+        return simulation, await subscription.get()
+    simulation, snapshot = asyncio.run(run())
+    assert simulation.engine.ticks == 5
+    assert simulation.engine.targets.size == 3
+    assert len(snapshot['errors']) == len(bad_commands)
+
+
+def test_bad_socket_lines_are_answered_on_that_socket():
+    async def run():
+        simulation = controller()
+        server = await control.serve(simulation, port=0)
+        port = server.sockets[0].getsockname()[1]
+        running = asyncio.create_task(simulation.run(max_ticks=50, tick_delay=0.001))
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'not json\n' + json.dumps(bad_commands[0]).encode() + b'\n')
+        await writer.drain()
+        replies = [json.loads(line) async for line in reader]
+        await running
+        server.close()
+        return simulation, replies
+    simulation, replies = asyncio.run(run())
+    assert simulation.engine.ticks == 50
+    assert len([reply for reply in replies if 'error' in reply]) == 2
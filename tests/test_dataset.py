@@ -0,0 +1,13 @@
+import numpy as np
+import dataset
+
+
+def test_generate_scenario_does_not_depend_on_chunk_size(tmp_path):
+    number_of_targets = dataset.block_size + 1000
+    scenarios = []
+    for chunk_size in (100, dataset.block_size, 10 ** 6):
+        path = tmp_path / f'{chunk_size}.npy'
+        dataset.generate_scenario(path, number_of_targets, seed=7, chunk_size=chunk_size)
+        scenarios.append(np.load(path))
+    for scenario in scenarios[1:]:
+        np.testing.assert_array_equal(scenario, scenarios[0])
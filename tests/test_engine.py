@@ -0,0 +1,20 @@
+import numpy as np
+import engine
+import launcher_with_drag
+
+
+def test_only_reachable_targets_are_assigned():
+    targets = (np.array([[300.0, 200, 0], [500, 300, 0]]), np.zeros((2, 3)))
+    near = launcher_with_drag.TomatoLauncher(targets, position=[310, 200, 0])
+    far = launcher_with_drag.TomatoLauncher(targets, position=[100, 100, 0])
+    simulation = engine.Engine([near, far])
+    found, target_angles = np.array([0, 1]), np.array([0.0, 90.0])
+    # the near launcher is the cheaper one for target 0, but it cannot launch fast enough to reach either target.
+    near.max_tomato_velocity_mag = 1.0
+    shots = [launcher.reachable(found, target_angles) for launcher in simulation.launchers]
+    assert len(shots[0][0]) == 0
+    assigned = simulation.assign(shots)
+    assert [(launcher, hit) for launcher, (hit, *_) in assigned] == [(1, 0)]
+    launcher, (hit, target_angle, velocity, impact) = assigned[0]
+    far.fire(hit, target_angle, velocity, impact)
+    assert simulation.targets.engaged[0] and len(far.flights) == 1
@@ -0,0 +1,8 @@
+import pytest
+import kernels
+
+
+@pytest.mark.skipif('numba' not in kernels.backends, reason='numba is not installed')
+def test_backends_agree():
+    assert kernels.parity()
+    assert 'numba' in kernels.backends, 'numba is installed but its kernels did not import'
@@ -0,0 +1,56 @@
+import numpy as np
+import kinematics
+
+rng = np.random.default_rng(0)
+
+
+def random_flights(shape):
+    """Random launch points, meeting points and accelerations, with flight times and drag broadcasting against them."""
+    x_0 = rng.uniform(-500, 500, shape + (3,))
+    x_f = rng.uniform(-500, 500, shape + (3,))
+    a = np.zeros(shape + (3,))
+    a[..., 2] = rng.uniform(-50, 0, shape)
+    return x_0, x_f, a
+
+
+def test_position_inverts_initial_velocity_ballistic():
+    x_0, x_f, a = random_flights((7, 5))
+    t = rng.integers(1, 30, (7, 1))
+    c1, c2 = kinematics.ballistic_coefficients(t)
+    v_0 = kinematics.initial_velocity(x_0, x_f, a, c1[..., None], c2[..., None])
+    np.testing.assert_allclose(kinematics.position(x_0, v_0, a, c1[..., None], c2[..., None]), x_f, atol=1e-9)
+
+
+def test_position_inverts_initial_velocity_drag():
+    x_0, x_f, a = random_flights((4, 6))
+    t = rng.uniform(0.5, 30, (4, 6))
+    b = rng.uniform(0.01, 2, (4, 1))
+    m = rng.uniform(0.1, 5, (1, 6))
+    c1, c2 = kinematics.drag_coefficients(t, b, m)
+    v_0 = kinematics.initial_velocity(x_0, x_f, a, c1[..., None], c2[..., None])
+    np.testing.assert_allclose(kinematics.position(x_0, v_0, a, c1[..., None], c2[..., None]), x_f, atol=1e-6)
+
+
+def test_drag_tends_to_ballistic():
+    t = np.arange(0, 20)
+    ballistic = kinematics.ballistic_coefficients(t)
+    for b in (1e-4, 1e-6, 1e-8):
+        drag = kinematics.drag_coefficients(t, b, 3.0)
+        np.testing.assert_allclose(drag[0], ballistic[0], rtol=1e-3, atol=1e-9)
+        np.testing.assert_allclose(drag[1], ballistic[1], rtol=1e-3, atol=1e-9)
+
+
+def test_drag_decays_with_b_over_m():
+    # m dv/dt = m a - b v, integrated in small steps. the decay has to go with exp(-b t / m), not exp(-b t).
+    b, m, t, steps = 0.5, 2.5, 10.0, 100000
+    a = np.array([0, 0, -40.0])
+    v = np.array([3.0, -2, 30])
+    x = np.zeros(3)
+    dt = t / steps
+    x_0, v_0 = x.copy(), v.copy()
+    for _ in range(steps):
+        half = v + 0.5 * dt * (a - b / m * v)
+        x += dt * half
+        v += dt * (a - b / m * half)
+    c1, c2 = kinematics.drag_coefficients(t, b, m)
+    np.testing.assert_allclose(kinematics.position(x_0, v_0, a, c1, c2), x, rtol=1e-6)
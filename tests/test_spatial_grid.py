@@ -0,0 +1,53 @@
+import numpy as np
+import launcher_with_drag
+from spatial_grid import SpatialGrid
+
+rng = np.random.default_rng(0)
+
+
+def crowded_launcher(number_of_targets=3000):
+    pos = rng.uniform(0, 60, (number_of_targets, 3))
+    vel = rng.uniform(-2, 2, (number_of_targets, 3))
+    launcher = launcher_with_drag.TomatoLauncher((pos, vel))
+    launcher.hit_distance = 3
+    return launcher
+
+
+def test_within_matches_brute_force():
+    targets = crowded_launcher().targets
+    targets.alive[rng.choice(len(targets.pos), 500, replace=False)] = False
+    grid = SpatialGrid(cell_size=4.0)
+    grid.build(targets)
+    points = rng.uniform(-5, 65, (200, 3))
+    point, target, distance = grid.within(points, 5.0)
+    everything = np.linalg.norm(points[:, None, :] - targets.pos[None, :, :], axis=2)
+    expected_point, expected_target = np.nonzero((everything < 5.0) & targets.alive[None, :])
+    assert sorted(zip(point.tolist(), target.tolist())) == sorted(zip(expected_point.tolist(),
+                                                                      expected_target.tolist()))
+    np.testing.assert_allclose(distance, everything[point, target])
+
+
+def test_passes_matches_brute_force():
+    launcher = crowded_launcher()
+    targets = launcher.targets
+    grid = SpatialGrid(cell_size=4.0)
+    grid.build(targets)
+    # targets killed after the grid was built, by another launcher earlier in the tick, cannot be hit any more.
+    targets.alive[rng.choice(len(targets.pos), 500, replace=False)] = False
+    start = rng.uniform(0, 60, (300, 3))
+    end = start + rng.uniform(-15, 15, (300, 3))  # longer than a cell, so paths are cut into pieces.
+    aimed_at = rng.integers(0, len(targets.pos), 300)
+    tomato, target, distance = launcher.flights.passes(grid, start, end, aimed_at)
+
+    path, target_start = end - start, targets.pos - targets.vel
+    gap = start[:, None, :] - target_start[None, :, :]
+    closing = path[:, None, :] - targets.vel[None, :, :]
+    along = np.clip(-np.sum(gap * closing, axis=2) / np.sum(closing ** 2, axis=2), 0, 1)
+    everything = np.linalg.norm(gap + along[..., None] * closing, axis=2)
+    close = (everything < launcher.hit_distance) & targets.alive[None, :]
+    close[np.arange(300), aimed_at] = False
+    expected_tomato, expected_target = np.nonzero(close)
+    assert len(expected_tomato) > 0
+    assert sorted(zip(tomato.tolist(), target.tolist())) == sorted(zip(expected_tomato.tolist(),
+                                                                       expected_target.tolist()))
+    np.testing.assert_allclose(distance, everything[tomato, target], rtol=1e-5)  # the targets are float32.
@@ -0,0 +1,7 @@
+import benchmark
+
+
+def test_importing_engine_only_loads_numpy():
+    seconds, loaded = benchmark.startup('engine')
+    assert loaded == []
+    assert seconds < benchmark.startup_budget